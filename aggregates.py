@@ -0,0 +1,128 @@
+"""Group-by aggregation of the collector snapshot, maintained from per-tick deltas"""
+from collector import cgroup_unit
+
+FIELDS = ('cpu_percent', 'rss', 'threads', 'io_read', 'io_write')
+
+# Grouping name -> function of (snapshot, row) returning the group key
+GROUPINGS = {
+    'user': lambda s, i: s.user[i],
+    'name': lambda s, i: s.name[i],
+    'exe': lambda s, i: s.exe[i] or s.name[i],
+    'cgroup': lambda s, i: s.cgroup[i] or '/',
+    'unit': lambda s, i: cgroup_unit(s.cgroup[i])
+}
+
+# ------------------ Group ------------------
+class Group:
+    __slots__ = ('members', 'sum', 'max', 'stale')
+
+    def __init__(self):
+        self.members = {}
+        self.sum = [0.0] * len(FIELDS)
+        self.max = [0.0] * len(FIELDS)
+        # Fields whose max holder shrank or left; recomputed lazily on read
+        self.stale = set()
+
+    def add(self, pid, values):
+        self.members[pid] = values
+        for k, v in enumerate(values):
+            self.sum[k] += v
+            if v >= self.max[k]:
+                self.max[k] = v
+
+    def remove(self, pid):
+        values = self.members.pop(pid)
+        for k, v in enumerate(values):
+            self.sum[k] -= v
+            if v >= self.max[k]:
+                self.stale.add(k)
+
+    def change(self, pid, old, new):
+        self.members[pid] = new
+        for k in range(len(FIELDS)):
+            self.sum[k] += new[k] - old[k]
+            if new[k] >= self.max[k]:
+                self.max[k] = new[k]
+                self.stale.discard(k)
+            elif old[k] >= self.max[k]:
+                self.stale.add(k)
+
+    def to_dict(self, key):
+        for k in self.stale:
+            self.max[k] = max((values[k] for values in self.members.values()), default=0.0)
+        self.stale.clear()
+        count = len(self.members)
+        result = {'key': key, 'count': count}
+        for k, field in enumerate(FIELDS):
+            result[field] = {
+                'sum': round(max(0.0, self.sum[k]), 1),
+                'avg': round(max(0.0, self.sum[k]) / count, 1) if count else 0.0,
+                'max': round(self.max[k], 1)
+            }
+        return result
+
+# ------------------ GroupAggregator ------------------
+class GroupAggregator:
+    """Keeps sum/avg/max/count per user, name, executable, cgroup and systemd unit.
+
+    Every grouping is updated from the change in each process's values between
+    ticks, so a process that did not change costs one comparison.
+    """
+
+    def __init__(self, groupings=tuple(GROUPINGS)):
+        self.groupings = groupings
+        self.groups = {name: {} for name in groupings}
+        # pid -> (create_time, name, group keys, values)
+        self.procs = {}
+
+    def update(self, snapshot, previous=None):
+        """Apply one collector snapshot"""
+        index = snapshot.index
+        procs = self.procs
+
+        # Exits, pid reuse and exec (a new name) all leave their old groups
+        for pid in [pid for pid, (create_time, name, _, _) in procs.items()
+                    if pid not in index
+                    or snapshot.create_time[index[pid]] != create_time
+                    or snapshot.name[index[pid]] != name]:
+            _, _, keys, _ = procs.pop(pid)
+            for grouping, key in zip(self.groupings, keys):
+                self._leave(grouping, key, pid)
+
+        columns = [getattr(snapshot, field) for field in FIELDS]
+        for pid, i in index.items():
+            values = tuple(column[i] for column in columns)
+            entry = procs.get(pid)
+            if entry is None:
+                keys = tuple(GROUPINGS[grouping](snapshot, i) for grouping in self.groupings)
+                procs[pid] = (snapshot.create_time[i], snapshot.name[i], keys, values)
+                for grouping, key in zip(self.groupings, keys):
+                    self.groups[grouping].setdefault(key, Group()).add(pid, values)
+                continue
+
+            create_time, name, keys, old = entry
+            if values == old:
+                continue
+            procs[pid] = (create_time, name, keys, values)
+            for grouping, key in zip(self.groupings, keys):
+                self.groups[grouping][key].change(pid, old, values)
+
+    def _leave(self, grouping, key, pid):
+        group = self.groups[grouping][key]
+        group.remove(pid)
+        if not group.members:
+            del self.groups[grouping][key]
+
+    def query(self, by, sort='rss', limit=None):
+        """Return groups for one grouping, largest sum of the sort field first"""
+        groups = self.groups.get(by)
+        if groups is None:
+            return None
+        k = FIELDS.index(sort) if sort in FIELDS else None
+        if k is None:
+            result = sorted(groups.items(), key=lambda item: len(item[1].members), reverse=True)
+        else:
+            result = sorted(groups.items(), key=lambda item: item[1].sum[k], reverse=True)
+        if limit:
+            result = result[:limit]
+        return [group.to_dict(key) for key, group in result]
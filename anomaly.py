@@ -0,0 +1,279 @@
+"""Streaming anomaly detection against EWMA baselines per process name and system metric"""
+import math
+
+PROCESS_METRICS = ('cpu_percent', 'rss', 'threads')
+SYSTEM_METRICS = ('cpu', 'memory', 'disk', 'network')
+SYSTEM_KEY = 'system'
+
+# Time constants are in seconds so they hold whatever the (adaptive) tick length
+BASELINE_SECONDS = 100  # memory of the learned baseline
+REFERENCE_SECONDS = 900 # memory of the slower reference that drift is scored against
+FAST_SECONDS = 5        # memory of the short-term level compared against the baseline for drift
+WARMUP_SECONDS = 30     # observation time before a baseline is trusted
+Z_THRESHOLD = 4.0       # |z| for a one-tick spike
+DRIFT_THRESHOLD = 2.0   # |z| the short-term level must hold for a drift
+DRIFT_SECONDS = 30      # how long the drift must last before it is reported
+ANOMALY_TTL = 60        # seconds a flag stays visible after it was last raised
+ROUTINE_SPIKE_RATE = 0.001  # share of samples above Z_THRESHOLD beyond which spikes are normal for a series
+ROUTINE_SPIKE_FACTOR = 2.0  # ...unless a spike is this many times larger than the usual ones
+BASELINE_TTL = 600      # seconds a process-name baseline is kept after its last instance exits
+
+def smoothing(elapsed, seconds):
+    """Return the EWMA weight of a sample arriving elapsed seconds after the previous one"""
+    return 1 - math.exp(-elapsed / seconds)
+
+def learn(mean, var, values, alpha):
+    """Return (mean, var) after folding one tick's values into an exponentially weighted estimate"""
+    n = len(values)
+    batch_mean = sum(values) / n
+    batch_var = sum((x - batch_mean) ** 2 for x in values) / n
+    diff = batch_mean - mean
+    return mean + alpha * diff, (1 - alpha) * (var + alpha * diff * diff) + alpha * batch_var
+
+# Smallest absolute deviation that counts, so near-constant series are not flagged on noise
+MIN_DEVIATION = {
+    'cpu_percent': 10.0,
+    'rss': 50 * 1024**2,
+    'threads': 10,
+    'cpu': 10.0,
+    'memory': 5.0,
+    'disk': 2.0,
+    'network': 1024**2
+}
+
+# ------------------ Baseline ------------------
+class Baseline:
+    """Exponentially weighted mean and variance of one series.
+
+    update() takes every value seen in one tick (one per process instance), so
+    memory and warm-up are measured in time however many instances share it.
+    Spikes are scored against the BASELINE_SECONDS estimate; drift against a
+    REFERENCE_SECONDS one that does not learn from a level while it is drifting,
+    so a step or a slow ramp cannot be absorbed before it is reported.
+    """
+    __slots__ = ('mean', 'var', 'reference', 'reference_var', 'count', 'age', 'exceed', 'spike', 'last_seen')
+
+    def __init__(self):
+        self.mean = 0.0
+        self.var = 0.0
+        self.reference = 0.0
+        self.reference_var = 0.0
+        self.count = 0
+        self.age = 0.0
+        # Smoothed share of samples scoring above Z_THRESHOLD
+        self.exceed = 0.0
+        # Smoothed absolute deviation of those samples
+        self.spike = 0.0
+        self.last_seen = None
+
+    def update(self, values, spikes=(), elapsed=1.0, settled=None):
+        """Learn from one tick's values and the deviations of those that scored as spikes.
+
+        settled are the values the reference may learn from (default: all of them).
+        """
+        if settled is None:
+            settled = values
+        n = len(values)
+        if self.count == 0:
+            self.mean = self.reference = sum(values) / n
+        else:
+            alpha = smoothing(elapsed, BASELINE_SECONDS)
+            self.mean, self.var = learn(self.mean, self.var, values, alpha)
+            if settled:
+                self.reference, self.reference_var = learn(self.reference, self.reference_var, settled,
+                                                           smoothing(elapsed, REFERENCE_SECONDS))
+            self.exceed += alpha * (len(spikes) / n - self.exceed)
+            if spikes:
+                size = sum(spikes) / len(spikes)
+                self.spike = size if self.spike == 0.0 else self.spike + alpha * (size - self.spike)
+            self.age += elapsed
+        self.count += 1
+
+    def zscore(self, x, metric):
+        """Return the z-score of x, or 0.0 while warming up or if the deviation is too small"""
+        return self._score(x, self.mean, self.var, metric)
+
+    def drift_score(self, level, metric):
+        """Return the z-score of a short-term level against the reference"""
+        return self._score(level, self.reference, self.reference_var, metric)
+
+    def _score(self, x, mean, var, metric):
+        if self.age < WARMUP_SECONDS:
+            return 0.0
+        deviation = x - mean
+        if abs(deviation) < MIN_DEVIATION[metric]:
+            return 0.0
+        # Floor sigma so a near-constant series does not turn any deviation into z = inf
+        return deviation / max(math.sqrt(var), MIN_DEVIATION[metric] / Z_THRESHOLD)
+
+    def routine(self, x):
+        """Whether a spike to x is ordinary for this series: frequent, and no larger than usual"""
+        return self.exceed >= ROUTINE_SPIKE_RATE and abs(x - self.mean) <= ROUTINE_SPIKE_FACTOR * self.spike
+
+# ------------------ AnomalyDetector ------------------
+class AnomalyDetector:
+    """Flags spikes and sustained drift for every process and system metric each tick.
+
+    Processes are scored against a baseline shared by all processes with the same
+    name, so a new instance of a known program is judged from its first tick.
+    Flagged anomalies are queued as events and kept per pid for ANOMALY_TTL.
+    """
+
+    def __init__(self):
+        self.baselines = {metric: {} for metric in PROCESS_METRICS}
+        self.system_baselines = {metric: Baseline() for metric in SYSTEM_METRICS}
+        # pid -> [create_time, short-term levels, seconds each level has drifted]
+        self.procs = {}
+        self.system_state = [[0.0] * len(SYSTEM_METRICS), [0.0] * len(SYSTEM_METRICS)]
+        self.last_network = None
+        self.last_time = None
+        self.last_system_time = None
+        # pid -> {(kind, metric): latest event}; system anomalies live under SYSTEM_KEY
+        self.active = {}
+        self.events = []
+
+    def update(self, snapshot, previous=None):
+        """Score and learn from one collector snapshot"""
+        index = snapshot.index
+        procs = self.procs
+        elapsed = snapshot.time - self.last_time if self.last_time is not None else 0.0
+        self.last_time = snapshot.time
+        fast_alpha = smoothing(elapsed, FAST_SECONDS)
+        for pid in [pid for pid in procs if pid not in index]:
+            del procs[pid]
+            self.active.pop(pid, None)
+
+        names = snapshot.name
+        create_times = snapshot.create_time
+        columns = [getattr(snapshot, metric) for metric in PROCESS_METRICS]
+        states = []
+        for pid, i in index.items():
+            state = procs.get(pid)
+            if state is None or state[0] != create_times[i]:
+                levels = [column[i] for column in columns]
+                state = procs[pid] = [create_times[i], levels, [0.0] * len(PROCESS_METRICS)]
+                self.active.pop(pid, None)
+            states.append((pid, i, state))
+
+        # One pass per metric column, scoring before learning so a spike cannot hide itself
+        for k, metric in enumerate(PROCESS_METRICS):
+            column = columns[k]
+            baselines = self.baselines[metric]
+            # name -> (values this tick, deviations of the spikes among them, values not drifting)
+            batches = {}
+            for pid, i, state in states:
+                x = column[i]
+                baseline = baselines.get(names[i])
+                if baseline is None:
+                    baseline = baselines[names[i]] = Baseline()
+                batch = batches.get(names[i])
+                if batch is None:
+                    batch = batches[names[i]] = ([], [], [])
+                batch[0].append(x)
+
+                z = baseline.zscore(x, metric)
+                if abs(z) >= Z_THRESHOLD:
+                    batch[1].append(abs(x - baseline.mean))
+                    if not baseline.routine(x):
+                        self._flag(snapshot.time, pid, names[i], 'spike', metric, x, baseline.mean, z)
+
+                levels, streaks = state[1], state[2]
+                levels[k] += fast_alpha * (x - levels[k])
+                if self._drift(snapshot.time, pid, names[i], metric, baseline, levels, streaks, k, elapsed):
+                    batch[2].append(x)
+
+            for name, (values, spikes, settled) in batches.items():
+                baseline = baselines[name]
+                baseline.update(values, spikes, elapsed, settled)
+                baseline.last_seen = snapshot.time
+
+            # Forget programs that have not run for a while
+            cutoff = snapshot.time - BASELINE_TTL
+            for name in [name for name, baseline in baselines.items() if baseline.last_seen < cutoff]:
+                del baselines[name]
+
+        self._expire(snapshot.time)
+
+    def update_system(self, stats):
+        """Score and learn from one get_system_stats() result"""
+        timestamp = stats['time'] / 1000
+        elapsed = timestamp - self.last_system_time if self.last_system_time is not None else 0.0
+        self.last_system_time = timestamp
+        fast_alpha = smoothing(elapsed, FAST_SECONDS)
+        values = dict(stats)
+        # Network is reported as a cumulative byte counter; score its rate per second
+        network = values['network']
+        values['network'] = (network - self.last_network) / elapsed if self.last_network is not None and elapsed > 0 else 0.0
+        self.last_network = network
+
+        levels, streaks = self.system_state
+        for k, metric in enumerate(SYSTEM_METRICS):
+            x = values[metric]
+            baseline = self.system_baselines[metric]
+            z = baseline.zscore(x, metric)
+            spike = abs(z) >= Z_THRESHOLD
+            if spike and not baseline.routine(x):
+                self._flag(timestamp, None, 'system', 'spike', metric, x, baseline.mean, z)
+            if baseline.count:
+                levels[k] += fast_alpha * (x - levels[k])
+            else:
+                levels[k] = x
+            settled = self._drift(timestamp, None, 'system', metric, baseline, levels, streaks, k, elapsed)
+            baseline.update([x], [abs(x - baseline.mean)] if spike else (), elapsed, [x] if settled else [])
+        self._expire(timestamp)
+
+    def _drift(self, timestamp, pid, name, metric, baseline, levels, streaks, k, elapsed):
+        """Advance the drift streak of one level; return whether the reference may learn from it"""
+        z_level = baseline.drift_score(levels[k], metric)
+        if abs(z_level) < DRIFT_THRESHOLD:
+            streaks[k] = 0.0
+            return True
+        streak = streaks[k] + elapsed
+        if streaks[k] < DRIFT_SECONDS <= streak:
+            self._flag(timestamp, pid, name, 'drift', metric, levels[k], baseline.reference, z_level)
+        streaks[k] = streak
+        # Once reported, a lasting shift is gradually accepted as the new normal
+        return streak >= DRIFT_SECONDS
+
+    def _flag(self, timestamp, pid, name, kind, metric, value, baseline, z):
+        event = {
+            'time': int(timestamp * 1000),
+            'pid': pid,
+            'name': name,
+            'kind': kind,
+            'metric': metric,
+            'value': round(value, 1),
+            'baseline': round(baseline, 1),
+            'zscore': round(z, 1) if math.isfinite(z) else None
+        }
+        flags = self.active.setdefault(SYSTEM_KEY if pid is None else pid, {})
+        # Only the first tick of an ongoing anomaly becomes an event; later ones refresh it
+        if (kind, metric) not in flags:
+            self.events.append(event)
+        flags[(kind, metric)] = event
+
+    def _expire(self, now):
+        cutoff = (now - ANOMALY_TTL) * 1000
+        for pid in list(self.active):
+            flags = {key: event for key, event in self.active[pid].items() if event['time'] >= cutoff}
+            if flags:
+                self.active[pid] = flags
+            else:
+                del self.active[pid]
+
+    def pop_events(self):
+        """Return and clear the anomalies raised since the last call"""
+        events, self.events = self.events, []
+        return events
+
+    def anomalies_for(self, pid):
+        """Return the currently active anomalies of one process"""
+        return list(self.active.get(pid, {}).values())
+
+    def flagged(self):
+        """Return pid -> list of active anomalies for every flagged process"""
+        return {pid: list(flags.values()) for pid, flags in self.active.items() if pid != SYSTEM_KEY}
+
+    def system_anomalies(self):
+        """Return the currently active system-wide anomalies"""
+        return list(self.active.get(SYSTEM_KEY, {}).values())
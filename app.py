@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, jsonify, request, render_template, Response, stream_with_context
 from flask_cors import CORS
 import psutil
 import time
@@ -8,6 +8,19 @@ import google.generativeai as genai
 import os
 import requests
 import json
+import sys
+import heapq
+import click
+from collector import ProcessCollector
+from process_tree import ProcessTree, SORT_KEYS
+from aggregates import GroupAggregator, GROUPINGS, FIELDS as GROUP_FIELDS
+from anomaly import AnomalyDetector
+from leaderboard import Leaderboards, WINDOWS as LEADERBOARD_WINDOWS, METRICS as LEADERBOARD_METRICS
+from leak_detector import LeakDetector
+from history import HistoryStore, COLUMNS as HISTORY_KINDS, FORMATS as EXPORT_FORMATS, parse_time
+from scheduler import AdaptiveScheduler
+from flight_recorder import FlightRecorder, FLIGHT_INTERVAL
+from proc_events import ProcessEventMonitor, POLL_INTERVAL
 
 app = Flask(__name__)
 CORS(app)
@@ -26,23 +39,66 @@ system_history = {
     'network': []
 }
 
+# Shared per-process collector and the trackers it keeps up to date each tick
+process_collector = ProcessCollector()
+process_tree = process_collector.register(ProcessTree())
+process_groups = process_collector.register(GroupAggregator())
+anomaly_detector = process_collector.register(AnomalyDetector())
+history_store = process_collector.register(HistoryStore())
+leaderboards = process_collector.register(Leaderboards())
+leak_detector = process_collector.register(LeakDetector())
+flight_recorder = process_collector.register(FlightRecorder())
+
+# Catches processes that start and exit between collector ticks
+process_events = ProcessEventMonitor(flight_recorder)
+
+# Paces update_system_stats: idle heartbeat without Socket.IO clients, bursts on activity
+sampling_scheduler = AdaptiveScheduler()
+SAMPLE_TIMEOUT = 5  # seconds a request waits for a woken sampler before sampling itself
+
+@sio.event
+def connect(sid, environ):
+    sampling_scheduler.subscribe()
+
+@sio.event
+def disconnect(sid):
+    sampling_scheduler.unsubscribe()
+
+def current_snapshot():
+    """Return the collector snapshot for a REST request.
+
+    Requests count as demand, so the sampler keeps its normal interval while the
+    API is polled; if it was idling, wait for the tick the request woke up.
+    """
+    previous = process_collector.snapshot
+    if sampling_scheduler.request():
+        snapshot = process_collector.wait_newer(previous, SAMPLE_TIMEOUT)
+        if snapshot is None:
+            # The sampling loop is not running (or is stuck); do not serve stale data
+            snapshot = process_collector.sample()
+        return snapshot
+    return process_collector.latest()
+
 def get_process_info():
-    processes = []
-    for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'username', 'num_threads', 'create_time']):
-        try:
-            pinfo = proc.info
-            processes.append({
-                'pid': pinfo['pid'],
-                'name': pinfo['name'],
-                'cpu_percent': round(pinfo['cpu_percent'], 1),
-                'memory_percent': round(pinfo['memory_percent'], 1),
-                'user': pinfo['username'],
-                'threads': pinfo['num_threads'],
-                'start_time': datetime.fromtimestamp(pinfo['create_time']).strftime('%Y-%m-%d %H:%M:%S')
-            })
-        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            pass
-    return processes
+    """Return the process list from the latest collector snapshot.
+
+    A separate process_iter scan would share psutil's cached cpu_percent state
+    with the collector, so each would measure CPU since the other's last call.
+    """
+    snapshot = current_snapshot()
+    total = psutil.virtual_memory().total
+    return [
+        {
+            'pid': snapshot.pid[i],
+            'name': snapshot.name[i],
+            'cpu_percent': round(snapshot.cpu_percent[i], 1),
+            'memory_percent': round(snapshot.rss[i] * 100 / total, 1),
+            'user': snapshot.user[i],
+            'threads': snapshot.threads[i],
+            'start_time': datetime.fromtimestamp(snapshot.create_time[i]).strftime('%Y-%m-%d %H:%M:%S')
+        }
+        for i in range(len(snapshot))
+    ]
 
 @app.route('/')
 def index():
@@ -50,7 +106,156 @@ def index():
 
 @app.route('/processes', methods=['GET'])
 def get_processes():
-    return jsonify(get_process_info())
+    processes = get_process_info()
+    # Annotate rows the streaming detector has flagged
+    with process_collector.lock:
+        flagged = anomaly_detector.flagged()
+    for process in processes:
+        if process['pid'] in flagged:
+            process['anomalies'] = flagged[process['pid']]
+    return jsonify(processes)
+
+@app.route('/anomalies', methods=['GET'])
+def get_anomalies():
+    """Return every anomaly currently flagged by the streaming detector"""
+    with process_collector.lock:
+        return jsonify({
+            'processes': anomaly_detector.flagged(),
+            'system': anomaly_detector.system_anomalies()
+        })
+
+@app.route('/process_tree', methods=['GET'])
+def get_process_tree():
+    """Return one level of the process tree; pass ?pid= to expand a node lazily"""
+    pid = request.args.get('pid', type=int)
+    sort = request.args.get('sort', 'cpu_percent')
+    limit = request.args.get('limit', type=int)
+    if sort not in SORT_KEYS:
+        return jsonify({'error': f'Invalid sort key: {sort}'}), 400
+    if limit is not None and limit <= 0:
+        return jsonify({'error': f'Invalid limit: {limit}'}), 400
+
+    current_snapshot()
+    with process_collector.lock:
+        children = process_tree.children(pid, sort=sort, limit=limit)
+        node = process_tree.node(pid) if pid is not None else None
+
+    if children is None:
+        return jsonify({'error': f'No process found with PID {pid}'}), 404
+    return jsonify({'node': node, 'children': children})
+
+@app.route('/groups', methods=['GET'])
+def get_process_groups():
+    """Return sum/avg/max/count of process metrics grouped by user, name, exe, cgroup or unit"""
+    by = request.args.get('by', 'user')
+    sort = request.args.get('sort', 'rss')
+    limit = request.args.get('limit', type=int)
+    if by not in GROUPINGS:
+        return jsonify({'error': f'Invalid grouping: {by}'}), 400
+    if sort not in GROUP_FIELDS and sort != 'count':
+        return jsonify({'error': f'Invalid sort key: {sort}'}), 400
+    if limit is not None and limit <= 0:
+        return jsonify({'error': f'Invalid limit: {limit}'}), 400
+
+    current_snapshot()
+    with process_collector.lock:
+        groups = process_groups.query(by, sort=sort, limit=limit)
+    return jsonify({'by': by, 'groups': groups})
+
+@app.route('/leaderboards', methods=['GET'])
+def get_leaderboards():
+    """Return top-N processes by CPU, RSS growth, I/O and threads over a sliding window"""
+    window = request.args.get('window', '5m')
+    metric = request.args.get('metric')
+    n = request.args.get('n', 5, type=int)
+    if window not in LEADERBOARD_WINDOWS:
+        return jsonify({'error': f'Invalid window: {window}'}), 400
+    if metric is not None and metric not in LEADERBOARD_METRICS:
+        return jsonify({'error': f'Invalid metric: {metric}'}), 400
+
+    current_snapshot()
+    with process_collector.lock:
+        return jsonify({'window': window, 'leaderboards': leaderboards.top(window, n, metric)})
+
+@app.route('/leaks', methods=['GET'])
+def get_leak_suspects():
+    """Return processes with sustained RSS growth, fastest first, with projected time to OOM"""
+    n = request.args.get('n', 10, type=int)
+    available = psutil.virtual_memory().available
+    current_snapshot()
+    with process_collector.lock:
+        suspects = leak_detector.suspects(n, available)
+    return jsonify({'available': available, 'suspects': suspects})
+
+@app.route('/short_lived', methods=['GET'])
+def get_short_lived():
+    """Return the process names with the most short-lived exits over the last minute.
+
+    dropped counts event-buffer overflows, after which some exits were missed.
+    """
+    n = request.args.get('n', 10, type=int)
+    return jsonify({
+        'mode': process_events.mode,
+        'dropped': process_events.dropped,
+        'processes': process_events.short_lived(n)
+    })
+
+@app.route('/flight_recorder', methods=['POST'])
+def dump_flight_recorder():
+    """Write the flight recorder buffer to disk now"""
+    path = flight_recorder.dump('manual', force=True)
+    return jsonify({'path': path})
+
+@app.route('/export', methods=['GET'])
+def export_history():
+    """Stream system or per-process history for a time range as CSV or NDJSON"""
+    kind = request.args.get('kind', 'processes')
+    fmt = request.args.get('format', 'csv')
+    compress = request.args.get('gzip', '0').lower() in ('1', 'true', 'yes')
+    if kind not in HISTORY_KINDS:
+        return jsonify({'error': f'Invalid kind: {kind}'}), 400
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({'error': f'Invalid format: {fmt}'}), 400
+    try:
+        start = parse_time(request.args.get('start'))
+        end = parse_time(request.args.get('end'))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid time range: {e}'}), 400
+
+    chunks = history_store.export(kind, start, end, fmt, compress,
+                                  pid=request.args.get('pid', type=int), name=request.args.get('name'))
+    filename = f"{kind}_history.{fmt}" + ('.gz' if compress else '')
+    mimetype = 'application/gzip' if compress else ('text/csv' if fmt == 'csv' else 'application/x-ndjson')
+    return Response(stream_with_context(chunks), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+@app.cli.command('export-history')
+@click.option('--kind', type=click.Choice(list(HISTORY_KINDS)), default='processes')
+@click.option('--start', help='Epoch seconds or ISO 8601 datetime (default: oldest sample)')
+@click.option('--end', help='Epoch seconds or ISO 8601 datetime (default: now)')
+@click.option('--format', 'fmt', type=click.Choice(EXPORT_FORMATS), default='csv')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip the output')
+@click.option('--pid', type=int, help='Only export this process')
+@click.option('--name', help='Only export processes with this name')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), help='Output file (default: stdout)')
+def export_history_command(kind, start, end, fmt, compress, pid, name, output):
+    """Stream recorded history for a time range to a file or stdout"""
+    try:
+        start = parse_time(start)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--start')
+    try:
+        end = parse_time(end)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--end')
+    chunks = history_store.export(kind, start, end, fmt, compress, pid=pid, name=name)
+    out = open(output, 'wb') if output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if output:
+            out.close()
 
 @app.route('/priority', methods=['POST'])
 def change_priority():
@@ -164,15 +369,37 @@ def get_system_stats():
 
 def update_system_stats():
     while True:
+        started = time.thread_time()
+        stats = None
         try:
             stats = get_system_stats()
             # Emit the stats through Socket.IO
             sio.emit('system_stats', stats)
+            # Refresh the per-process snapshot and everything derived from it
+            process_collector.sample()
+            # SQLite writes happen outside the collector lock so read endpoints are not blocked
+            history_store.record_system(stats)
+            history_store.flush()
+            with process_collector.lock:
+                anomaly_detector.update_system(stats)
+                anomalies = anomaly_detector.pop_events()
+                active = {
+                    (event['pid'], event['kind'], event['metric']): f"{event['name']} {event['metric']} {event['kind']}"
+                    for events in [anomaly_detector.system_anomalies(), *anomaly_detector.flagged().values()]
+                    for event in events
+                }
+            if anomalies:
+                sio.emit('anomalies', anomalies)
+                flight_recorder.record('anomalies', anomalies)
+            # Keep the seconds leading up to an anomaly, once per anomaly rather than per tick
+            path = flight_recorder.update_alerts(active)
+            if path:
+                print(f"Flight recording written to {path}")
         except Exception as e:
             print(f"Error in update_system_stats: {str(e)}")
         finally:
-            # Update every second
-            time.sleep(1)
+            # Sleep for as long as demand, activity and the CPU budget allow
+            sampling_scheduler.wait(stats, time.thread_time() - started)
 
 # AI Analysis Functions
 def call_gemini_api(prompt):
@@ -232,22 +459,29 @@ def analyze_process_behavior(process_data):
     except Exception as e:
         return f"Error analyzing process: {str(e)}"
 
-def detect_anomalies(process_data):
-    """Detect anomalous process behavior"""
+def explain_anomalies(process_data, anomalies):
+    """Explain anomalies already flagged by the streaming detector"""
     try:
+        findings = '\n'.join(
+            f"- {a['kind']} in {a['metric']}: {a['value']} vs baseline {a['baseline']} (z-score {a['zscore']})"
+            for a in anomalies
+        )
         prompt = f"""
-        Analyze this process for anomalies:
+        The monitor's statistical baseline flagged these anomalies:
         Process: {process_data['name']}
         CPU Usage: {process_data['cpu_percent']}%
         Memory Usage: {process_data['memory_percent']}%
         Threads: {process_data['threads']}
         
-        Identify if this behavior is normal or anomalous.
+        Flagged anomalies:
+        {findings}
+        
+        Explain likely causes and whether they need attention.
         """
         
         return call_gemini_api(prompt)
     except Exception as e:
-        return f"Error detecting anomalies: {str(e)}"
+        return f"Error explaining anomalies: {str(e)}"
 
 def get_process_recommendations(process_data):
     """Get AI-powered process management recommendations"""
@@ -282,7 +516,13 @@ def analyze_process(pid):
         }
         
         analysis = analyze_process_behavior(process_data)
-        anomalies = detect_anomalies(process_data)
+        # The LLM is only asked about anomalies the streaming detector already found
+        with process_collector.lock:
+            flagged = anomaly_detector.anomalies_for(pid)
+        if flagged:
+            anomalies = explain_anomalies(process_data, flagged)
+        else:
+            anomalies = "No anomalies detected against this process's learned baseline."
         recommendations = get_process_recommendations(process_data)
         
         return jsonify({
@@ -312,35 +552,22 @@ def analyze_system():
             
         network = psutil.net_io_counters()
         
-        # Get top processes by CPU and memory
-        top_cpu_processes = []
-        top_memory_processes = []
-        
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-            try:
-                pinfo = proc.info
-                if pinfo['cpu_percent'] is not None:
-                    top_cpu_processes.append({
-                        'pid': pinfo['pid'],
-                        'name': pinfo['name'],
-                        'cpu_percent': round(float(pinfo['cpu_percent']), 1)
-                    })
-                if pinfo['memory_percent'] is not None:
-                    top_memory_processes.append({
-                        'pid': pinfo['pid'],
-                        'name': pinfo['name'],
-                        'memory_percent': round(float(pinfo['memory_percent']), 1)
-                    })
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, ValueError):
-                continue
-        
-        # Sort by usage
-        top_cpu_processes.sort(key=lambda x: x['cpu_percent'], reverse=True)
-        top_memory_processes.sort(key=lambda x: x['memory_percent'], reverse=True)
-        
-        # Take top 5
-        top_cpu_processes = top_cpu_processes[:5]
-        top_memory_processes = top_memory_processes[:5]
+        # Sustained consumers from the windowed leaderboards instead of one instantaneous sample
+        snapshot = current_snapshot()
+        with process_collector.lock:
+            sustained = leaderboards.top('5m', 5)
+            growth = leaderboards.top('15m', 5, 'rss_growth')
+        short_lived = process_events.short_lived(5)
+        
+        top_cpu_processes = [
+            {'pid': p['pid'], 'name': p['name'], 'cpu_percent': p['value']}
+            for p in sustained['cpu']
+        ]
+        top_memory_processes = [
+            {'pid': snapshot.pid[i], 'name': snapshot.name[i],
+             'memory_percent': round(snapshot.rss[i] * 100 / memory.total, 1)}
+            for i in heapq.nlargest(5, range(len(snapshot)), key=snapshot.rss.__getitem__)
+        ]
         
         # Prepare data for AI analysis
         system_data = {
@@ -350,7 +577,11 @@ def analyze_system():
             'network_bytes_sent': int(network.bytes_sent),
             'network_bytes_recv': int(network.bytes_recv),
             'top_cpu_processes': top_cpu_processes,
-            'top_memory_processes': top_memory_processes
+            'top_memory_processes': top_memory_processes,
+            'top_rss_growth_processes': growth,
+            'top_io_processes': sustained['io'],
+            'top_thread_processes': sustained['threads'],
+            'short_lived_processes': short_lived
         }
         
         # Generate AI analysis
@@ -363,12 +594,24 @@ def analyze_system():
         - Disk Usage: {system_data['disk_percent']:.1f}%
         - Network: {system_data['network_bytes_sent']} bytes sent, {system_data['network_bytes_recv']} bytes received
         
-        Top CPU Processes:
+        Top CPU Processes (5-minute average):
         {', '.join([f"{p['name']} ({p['cpu_percent']:.1f}%)" for p in system_data['top_cpu_processes']])}
         
         Top Memory Processes:
         {', '.join([f"{p['name']} ({p['memory_percent']:.1f}%)" for p in system_data['top_memory_processes']])}
         
+        Fastest RSS Growth (15 minutes):
+        {', '.join([f"{p['name']} (+{p['value'] / 1024**2:.1f} MB)" for p in system_data['top_rss_growth_processes']])}
+        
+        Top I/O Processes (5-minute average):
+        {', '.join([f"{p['name']} ({p['value'] / 1024:.1f} KB/s)" for p in system_data['top_io_processes']])}
+        
+        Most Threads (5-minute average):
+        {', '.join([f"{p['name']} ({p['value']:.0f})" for p in system_data['top_thread_processes']])}
+        
+        Short-Lived Processes (exits within seconds of starting, last minute):
+        {', '.join([f"{p['name']} ({p['count']}x, avg {p['avg_lifetime_ms']:.0f} ms)" for p in system_data['short_lived_processes']]) or 'None'}
+        
         Provide:
         1. Overall system health assessment
         2. Resource usage analysis
@@ -393,8 +636,14 @@ def get_system_history():
     return jsonify(system_history)
 
 if __name__ == '__main__':
-    import threading
-    stats_thread = threading.Thread(target=update_system_stats)
-    stats_thread.daemon = True
-    stats_thread.start()
-    app.run(debug=True, port=5000) 
\ No newline at end of file
+    # debug=True runs the app under Werkzeug's reloader: only its serving child
+    # samples, otherwise the watching parent would write duplicate history rows
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        import threading
+        stats_thread = threading.Thread(target=update_system_stats)
+        stats_thread.daemon = True
+        stats_thread.start()
+        # Secondary loops share the stats loop's subscribers and CPU budget
+        flight_recorder.start(sampling_scheduler.follower(FLIGHT_INTERVAL))
+        process_events.start(sampling_scheduler.follower(POLL_INTERVAL))
+    app.run(debug=True, port=5000)
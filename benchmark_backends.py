@@ -0,0 +1,49 @@
+"""Compare the per-tick cost of a plain psutil.process_iter scan with each collector backend.
+
+Usage: python benchmark_backends.py [iterations]
+"""
+import sys
+import time
+
+import psutil
+
+from collector import BACKENDS
+
+def get_process_info():
+    """The per-request scan /processes used before it was served from the collector"""
+    processes = []
+    for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 'username', 'num_threads', 'create_time']):
+        try:
+            processes.append(dict(proc.info))
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            pass
+    return processes
+
+def time_calls(func, iterations):
+    """Return (best, mean) wall time in milliseconds over iterations calls, after one warm-up"""
+    func()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings), sum(timings) / len(timings)
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    candidates = [('get_process_info', get_process_info, len(get_process_info()))]
+    for name, backend_class in BACKENDS.items():
+        try:
+            backend = backend_class()
+        except RuntimeError as e:
+            print(f"Skipping {name}: {e}")
+            continue
+        candidates.append((f"{name} backend", backend.sample, len(backend.sample())))
+
+    print(f"{'Sampler':<20}{'Processes':>10}{'Best (ms)':>12}{'Mean (ms)':>12}")
+    for label, func, count in candidates:
+        best, mean = time_calls(func, iterations)
+        print(f"{label:<20}{count:>10}{best:>12.2f}{mean:>12.2f}")
+
+if __name__ == '__main__':
+    main()
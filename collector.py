@@ -0,0 +1,377 @@
+import os
+import threading
+import time
+from array import array
+
+import psutil
+
+try:
+    import pwd
+except ImportError:  # Windows
+    pwd = None
+
+# Sampling backend used when none is passed explicitly: 'psutil' or 'procfs'
+DEFAULT_BACKEND = os.getenv('PROCESS_MONITOR_BACKEND', 'psutil')
+
+# ------------------ Snapshot ------------------
+class Snapshot:
+    """Column-oriented view of every process seen in a single collector tick"""
+
+    def __init__(self, timestamp):
+        self.time = timestamp
+        self.pid = array('q')
+        self.ppid = array('q')
+        self.create_time = array('d')
+        self.name = []
+        self.user = []
+        self.exe = []
+        self.cgroup = []
+        self.cpu_percent = array('d')
+        self.rss = array('q')
+        self.threads = array('q')
+        self.io_read = array('q')
+        self.io_write = array('q')
+        self.nice = array('q')
+        # pid -> row number, so trackers can look processes up in O(1)
+        self.index = {}
+
+    def __len__(self):
+        return len(self.pid)
+
+    def append(self, pid, ppid, create_time, name, user, exe, cgroup, cpu_percent, rss, threads, io_read, io_write, nice=0):
+        """Add one process as a new row"""
+        self.index[pid] = len(self.pid)
+        self.pid.append(pid)
+        self.ppid.append(ppid)
+        self.create_time.append(create_time)
+        self.name.append(name)
+        self.user.append(user)
+        self.exe.append(exe)
+        self.cgroup.append(cgroup)
+        self.cpu_percent.append(cpu_percent)
+        self.rss.append(rss)
+        self.threads.append(threads)
+        self.io_read.append(io_read)
+        self.io_write.append(io_write)
+        self.nice.append(nice)
+
+    def row(self, i):
+        """Return row i as a plain dict"""
+        return {
+            'pid': self.pid[i],
+            'ppid': self.ppid[i],
+            'create_time': self.create_time[i],
+            'name': self.name[i],
+            'user': self.user[i],
+            'exe': self.exe[i],
+            'cgroup': self.cgroup[i],
+            'cpu_percent': self.cpu_percent[i],
+            'rss': self.rss[i],
+            'threads': self.threads[i],
+            'io_read': self.io_read[i],
+            'io_write': self.io_write[i],
+            'nice': self.nice[i]
+        }
+
+    def rows(self):
+        """Iterate over all rows as dicts"""
+        for i in range(len(self.pid)):
+            yield self.row(i)
+
+# ------------------ Sampling Backends ------------------
+def read_cgroup(pid):
+    """Return the cgroup path of a process (the unified v2 hierarchy when present)"""
+    try:
+        with open(f"/proc/{pid}/cgroup") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return ''
+    fallback = ''
+    for line in lines:
+        hierarchy, controllers, path = line.split(':', 2)
+        if hierarchy == '0' and not controllers:
+            return path
+        if controllers == 'name=systemd' or not fallback:
+            fallback = path
+    return fallback
+
+def cgroup_unit(path):
+    """Reduce a cgroup path to its systemd unit (e.g. nginx.service), if any"""
+    for part in reversed(path.split('/')):
+        if part.endswith(('.service', '.scope')):
+            return part
+    return path or '/'
+
+class PsutilBackend:
+    """Portable sampling backend built on psutil.process_iter"""
+
+    ATTRS = ['pid', 'ppid', 'name', 'exe', 'username', 'cpu_percent', 'memory_info', 'num_threads', 'create_time', 'nice']
+    if hasattr(psutil.Process, 'io_counters'):
+        ATTRS.append('io_counters')
+
+    def __init__(self):
+        self.read_cgroups = os.path.exists('/proc/self/cgroup')
+        # (pid, create_time) -> cgroup path, read once per process rather than every tick
+        self.cgroups = {}
+
+    def sample(self):
+        snapshot = Snapshot(time.time())
+        cgroups = {}
+        for proc in psutil.process_iter(self.ATTRS):
+            try:
+                info = proc.info
+                mem = info['memory_info']
+                io = info.get('io_counters')
+                key = (info['pid'], info['create_time'])
+                cgroup = self.cgroups.get(key)
+                if cgroup is None:
+                    cgroup = read_cgroup(info['pid']) if self.read_cgroups else ''
+                cgroups[key] = cgroup
+                snapshot.append(
+                    info['pid'],
+                    info['ppid'] or 0,
+                    info['create_time'] or 0.0,
+                    info['name'] or '',
+                    info['username'] or 'N/A',
+                    info['exe'] or '',
+                    cgroup,
+                    info['cpu_percent'] or 0.0,
+                    mem.rss if mem else 0,
+                    info['num_threads'] or 0,
+                    io.read_bytes if io else 0,
+                    io.write_bytes if io else 0,
+                    info['nice'] or 0
+                )
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                pass
+        self.cgroups = cgroups
+        return snapshot
+
+class ProcfsBackend:
+    """Linux fast path that reads /proc/[pid]/stat directly instead of building psutil objects.
+
+    Per tick each process costs one read of stat, one of status (the real uid,
+    which setuid can change at any time) and, when permitted, io. The
+    name-derived details (exe, cgroup) are read once per process and only
+    refreshed on exec. Like psutil, a comm truncated to 15
+    characters is expanded from cmdline, so names match the psutil backend.
+    """
+
+    def __init__(self, proc='/proc'):
+        if not os.path.isdir(f"{proc}/self"):
+            raise RuntimeError(f"procfs backend requires a Linux {proc} filesystem")
+        self.proc = proc
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_size = os.sysconf('SC_PAGE_SIZE')
+        self.boot_time = self._read_boot_time()
+        self.read_cgroups = os.path.exists(f"{proc}/self/cgroup")
+        # Reused for every read so sampling does not allocate a file object per file
+        self.buffer = bytearray(4096)
+        self.usernames = {}
+        # (pid, starttime) -> (comm, exe, cgroup, io_allowed, name)
+        self.identities = {}
+        # (pid, starttime) -> utime + stime ticks at the previous sample
+        self.cpu_ticks = {}
+        self.last_time = None
+
+    def _read_boot_time(self):
+        with open(f"{self.proc}/stat", 'rb') as f:
+            for line in f:
+                if line.startswith(b'btime'):
+                    return float(line.split()[1])
+        return psutil.boot_time()
+
+    def _read(self, path):
+        """Read a file into self.buffer and return its length; parse it in place"""
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            n = os.readv(fd, [self.buffer])
+            # Grow and re-read on the rare file that does not fit
+            while n == len(self.buffer):
+                self.buffer = bytearray(len(self.buffer) * 2)
+                os.lseek(fd, 0, os.SEEK_SET)
+                n = os.readv(fd, [self.buffer])
+        finally:
+            os.close(fd)
+        return n
+
+    def _username(self, uid):
+        name = self.usernames.get(uid)
+        if name is None:
+            try:
+                name = pwd.getpwuid(uid).pw_name
+            except (KeyError, AttributeError):
+                name = str(uid)
+            self.usernames[uid] = name
+        return name
+
+    def _user(self, pid):
+        """Return the name of the real uid in status, as psutil's username() does"""
+        try:
+            n = self._read(f"{self.proc}/{pid}/status")
+            start = self.buffer.index(b'\nUid:', 0, n) + 5
+            return self._username(int(self.buffer[start:start + 32].split()[0]))
+        except (OSError, ValueError):
+            return 'N/A'
+
+    def _identity(self, pid, comm):
+        base = f"{self.proc}/{pid}"
+        try:
+            exe = os.readlink(f"{base}/exe")
+        except OSError:
+            exe = ''
+        cgroup = read_cgroup(pid) if self.read_cgroups else ''
+        io_allowed = os.access(f"{base}/io", os.R_OK)
+        return (comm, exe, cgroup, io_allowed, self._expand_name(base, comm))
+
+    def _expand_name(self, base, comm):
+        """Return comm, or the cmdline program name it is a truncated prefix of (as psutil does)"""
+        if len(comm) < 15:
+            return comm
+        try:
+            n = self._read(f"{base}/cmdline")
+        except OSError:
+            return comm
+        data = memoryview(self.buffer)[:n].tobytes()
+        if data.endswith(b'\0'):
+            data = data[:-1]
+        # Processes that rewrite their title may separate arguments with spaces
+        args = data.split(b'\0') if b'\0' in data else data.split(b' ')
+        program = os.path.basename(args[0].decode(errors='replace')) if args else ''
+        return program if program.startswith(comm) else comm
+
+    def _read_io(self, pid):
+        n = self._read(f"{self.proc}/{pid}/io")
+        lines = memoryview(self.buffer)[:n].tobytes().split(b'\n')
+        # Fixed layout: rchar, wchar, syscr, syscw, read_bytes, write_bytes, ...
+        return int(lines[4][12:]), int(lines[5][13:])
+
+    def sample(self):
+        now = time.time()
+        snapshot = Snapshot(now)
+        elapsed = now - self.last_time if self.last_time else 0.0
+        clock_ticks = self.clock_ticks
+        page_size = self.page_size
+        previous_ticks = self.cpu_ticks
+        cpu_ticks = {}
+        identities = {}
+
+        for entry in os.scandir(self.proc):
+            pid = entry.name
+            if not pid.isdigit():
+                continue
+            try:
+                n = self._read(f"{self.proc}/{pid}/stat")
+                buffer = self.buffer
+                view = memoryview(buffer)
+                # comm may contain spaces and parentheses, so split around the last ')'
+                close = buffer.rindex(b')', 0, n)
+                fields = view[close + 2:n].tobytes().split()
+                starttime = int(fields[19])
+                key = (int(pid), starttime)
+                ticks = int(fields[11]) + int(fields[12])
+                cpu_ticks[key] = ticks
+
+                comm = str(view[buffer.index(b'(', 0, close) + 1:close], 'utf-8', 'replace')
+                view.release()
+                identity = self.identities.get(key)
+                if identity is None or identity[0] != comm:
+                    identity = self._identity(pid, comm)
+                identities[key] = identity
+                user = self._user(pid)
+
+                io_read = io_write = 0
+                if identity[3]:
+                    try:
+                        io_read, io_write = self._read_io(pid)
+                    except OSError:
+                        # ptrace access checks can refuse io even when the mode bits allow it
+                        identities[key] = identity[:3] + (False,) + identity[4:]
+            except (OSError, ValueError, IndexError):
+                # The process exited mid-read or its files are unreadable
+                continue
+
+            last = previous_ticks.get(key)
+            if last is not None and elapsed > 0:
+                cpu_percent = (ticks - last) / clock_ticks / elapsed * 100
+            else:
+                cpu_percent = 0.0
+
+            snapshot.append(
+                key[0],
+                int(fields[1]),
+                self.boot_time + starttime / clock_ticks,
+                identity[4],
+                user,
+                identity[1],
+                identity[2],
+                cpu_percent,
+                int(fields[21]) * page_size,
+                int(fields[17]),
+                io_read,
+                io_write,
+                int(fields[16])
+            )
+
+        self.cpu_ticks = cpu_ticks
+        self.identities = identities
+        self.last_time = now
+        return snapshot
+
+BACKENDS = {
+    'psutil': PsutilBackend,
+    'procfs': ProcfsBackend
+}
+
+def create_backend(name=None):
+    """Create the sampling backend called name (defaults to PROCESS_MONITOR_BACKEND)"""
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown sampling backend: {name}")
+    return BACKENDS[name]()
+
+# ------------------ ProcessCollector ------------------
+class ProcessCollector:
+    """Samples all processes once per tick and feeds the snapshot to registered trackers.
+
+    A tracker is any object with an update(snapshot, previous) method. Trackers are
+    updated under self.lock, which readers should also hold while querying them.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or create_backend()
+        self.trackers = []
+        self.snapshot = None
+        self.lock = threading.RLock()
+        # Notified after every sample, for readers waiting on a fresh snapshot
+        self.sampled = threading.Condition(self.lock)
+
+    def register(self, tracker):
+        """Register a tracker and return it"""
+        with self.lock:
+            self.trackers.append(tracker)
+        return tracker
+
+    def sample(self):
+        """Take a new snapshot and update every tracker with it"""
+        snapshot = self.backend.sample()
+        with self.lock:
+            previous = self.snapshot
+            for tracker in self.trackers:
+                tracker.update(snapshot, previous)
+            self.snapshot = snapshot
+            self.sampled.notify_all()
+        return snapshot
+
+    def latest(self):
+        """Return the most recent snapshot, sampling once if nothing has been collected yet"""
+        if self.snapshot is None:
+            return self.sample()
+        return self.snapshot
+
+    def wait_newer(self, previous, timeout):
+        """Wait up to timeout seconds for a snapshot other than previous; return it, or None on timeout"""
+        with self.sampled:
+            if self.sampled.wait_for(lambda: self.snapshot is not previous, timeout):
+                return self.snapshot
+        return None
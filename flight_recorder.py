@@ -0,0 +1,160 @@
+"""In-memory flight recorder of recent high-rate samples, dumped to disk when an alert fires"""
+import heapq
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+import psutil
+
+FLIGHT_SECONDS = float(os.getenv('PROCESS_MONITOR_FLIGHT_SECONDS', '120'))
+FLIGHT_DIR = os.getenv('PROCESS_MONITOR_FLIGHT_DIR', 'flight_recordings')
+FLIGHT_MAX_FILES = int(os.getenv('PROCESS_MONITOR_FLIGHT_MAX_FILES', '20'))
+FLIGHT_INTERVAL = 0.25     # seconds between system samples
+FLIGHT_TOP_PROCESSES = 10  # processes kept per collector tick
+DUMP_COOLDOWN = 60         # seconds before another alert can trigger a dump
+MAX_SAMPLES = 100000
+
+def sample_system(previous=None):
+    """Return (sample, cpu_times) with CPU computed from the delta to previous cpu_times"""
+    times = psutil.cpu_times()
+    cpu = 0.0
+    if previous is not None:
+        total = sum(times) - sum(previous)
+        idle = (times.idle + getattr(times, 'iowait', 0)) - (previous.idle + getattr(previous, 'iowait', 0))
+        cpu = round(100 * (1 - idle / total), 1) if total > 0 else 0.0
+    memory = psutil.virtual_memory()
+    sample = {'cpu': cpu, 'memory': memory.percent, 'available': memory.available, 'swap': psutil.swap_memory().percent}
+    disk = psutil.disk_io_counters()
+    if disk is not None:
+        sample['disk_read'] = disk.read_bytes
+        sample['disk_write'] = disk.write_bytes
+    net = psutil.net_io_counters()
+    sample['net_sent'] = net.bytes_sent
+    sample['net_recv'] = net.bytes_recv
+    return sample, times
+
+# ------------------ FlightRecorder ------------------
+class FlightRecorder:
+    """Ring buffer of the last FLIGHT_SECONDS of samples.
+
+    start() samples system counters every FLIGHT_INTERVAL seconds; as a
+    collector tracker it also keeps the top processes by CPU and RSS of every
+    tick, and record() accepts any other event (anomalies, process exits).
+    update_alerts() writes the buffer as NDJSON when an alert starts, at most
+    once per DUMP_COOLDOWN, keeping the newest max_files recordings.
+    """
+
+    def __init__(self, seconds=FLIGHT_SECONDS, directory=FLIGHT_DIR, max_files=FLIGHT_MAX_FILES):
+        self.seconds = seconds
+        self.directory = directory
+        self.max_files = max_files
+        self.samples = deque(maxlen=MAX_SAMPLES)
+        self.lock = threading.Lock()
+        self.running = False
+        self.scheduler = None
+        self.last_dump = None
+        self.dumps = 0
+        self.alerts = set()
+
+    def start(self, scheduler=None):
+        """Start the system sampler in a daemon thread, paced by scheduler if given.
+
+        Without a scheduler it samples every FLIGHT_INTERVAL seconds regardless
+        of demand or CPU cost.
+        """
+        self.scheduler = scheduler
+        self.running = True
+        threading.Thread(target=self._sample_loop, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.scheduler is not None:
+            self.scheduler.wake()
+
+    def _sample_loop(self):
+        times = None
+        while self.running:
+            started = time.thread_time()
+            try:
+                sample, times = sample_system(times)
+                self.record('system', sample)
+            except Exception as e:
+                print(f"Error in flight recorder: {str(e)}")
+            if self.scheduler is not None:
+                self.scheduler.wait(None, time.thread_time() - started)
+            else:
+                time.sleep(FLIGHT_INTERVAL)
+
+    def record(self, kind, data):
+        """Append one sample and drop those older than the recording window"""
+        now = time.time()
+        with self.lock:
+            self.samples.append((now, kind, data))
+            cutoff = now - self.seconds
+            while self.samples[0][0] < cutoff:
+                self.samples.popleft()
+
+    def update(self, snapshot, previous=None):
+        """Keep the heaviest processes of a collector snapshot"""
+        rows = len(snapshot)
+        top = set(heapq.nlargest(FLIGHT_TOP_PROCESSES, range(rows), key=snapshot.cpu_percent.__getitem__))
+        top.update(heapq.nlargest(FLIGHT_TOP_PROCESSES, range(rows), key=snapshot.rss.__getitem__))
+        self.record('processes', [
+            {'pid': snapshot.pid[i], 'name': snapshot.name[i], 'cpu_percent': snapshot.cpu_percent[i],
+             'rss': snapshot.rss[i], 'threads': snapshot.threads[i]}
+            for i in sorted(top)
+        ])
+
+    def update_alerts(self, alerts):
+        """Take the currently active alerts (key -> reason) and dump if any of them just started"""
+        started = [reason for key, reason in alerts.items() if key not in self.alerts]
+        self.alerts = set(alerts)
+        if started:
+            return self.dump(started[0])
+        return None
+
+    def dump(self, reason, force=False):
+        """Write the buffer to a new file in a background thread; return its path, or None during cooldown"""
+        now = time.time()
+        with self.lock:
+            if not force and self.last_dump is not None and now - self.last_dump < DUMP_COOLDOWN:
+                return None
+            self.last_dump = now
+            self.dumps += 1
+            dumps = self.dumps
+            samples = list(self.samples)
+        slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', reason)[:40].strip('_')
+        # Milliseconds plus a sequence number, so forced dumps in the same instant get their own file
+        stamp = datetime.fromtimestamp(now).strftime('%Y%m%d-%H%M%S-%f')[:-3]
+        path = os.path.join(self.directory, f"flight-{stamp}-{dumps % 1000:03d}-{slug}.ndjson")
+        threading.Thread(target=self._write, args=(path, reason, now, samples), daemon=True).start()
+        return path
+
+    def _write(self, path, reason, now, samples):
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(json.dumps({'reason': reason, 'time': now, 'seconds': self.seconds, 'samples': len(samples)}))
+                f.write('\n')
+                for t, kind, data in samples:
+                    f.write(json.dumps({'time': t, 'kind': kind, 'data': data}))
+                    f.write('\n')
+            self._prune()
+        except Exception as e:
+            print(f"Error writing flight recording {path}: {str(e)}")
+
+    def _prune(self):
+        """Delete the oldest recordings beyond max_files"""
+        # Names start with a sortable timestamp, so name order is age order
+        recordings = sorted(name for name in os.listdir(self.directory)
+                            if name.startswith('flight-') and name.endswith('.ndjson'))
+        for name in recordings[:-self.max_files]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                # Another writer's prune got there first
+                pass
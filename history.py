@@ -0,0 +1,176 @@
+"""On-disk history of system and per-process samples with streaming export"""
+import csv
+import io
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime
+
+HISTORY_DB = os.getenv('PROCESS_MONITOR_HISTORY_DB', 'history.db')
+RETENTION_HOURS = float(os.getenv('PROCESS_MONITOR_HISTORY_HOURS', '24'))
+PURGE_EVERY = 600       # ticks between retention purges
+EXPORT_CHUNK_ROWS = 1000
+
+COLUMNS = {
+    'system': ('time', 'cpu', 'memory', 'disk', 'network'),
+    'processes': ('time', 'pid', 'name', 'user', 'cpu_percent', 'rss', 'threads', 'io_read', 'io_write')
+}
+TABLES = {
+    'system': 'system_samples',
+    'processes': 'process_samples'
+}
+FORMATS = ('csv', 'ndjson')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS system_samples (
+    time REAL NOT NULL, cpu REAL, memory REAL, disk REAL, network REAL
+);
+CREATE INDEX IF NOT EXISTS system_samples_time ON system_samples (time);
+CREATE TABLE IF NOT EXISTS process_samples (
+    time REAL NOT NULL, pid INTEGER, name TEXT, user TEXT, cpu_percent REAL,
+    rss INTEGER, threads INTEGER, io_read INTEGER, io_write INTEGER
+);
+CREATE INDEX IF NOT EXISTS process_samples_time ON process_samples (time);
+"""
+
+def parse_time(value, default=None):
+    """Parse epoch seconds or an ISO 8601 datetime into epoch seconds"""
+    if value in (None, ''):
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+# ------------------ HistoryStore ------------------
+class HistoryStore:
+    """Collector tracker that appends every tick to SQLite and prunes past the retention window.
+
+    update() runs under the collector lock, so it only queues the snapshot;
+    the owner calls flush() outside the lock to write and purge.
+    """
+
+    def __init__(self, path=HISTORY_DB, retention_hours=RETENTION_HOURS):
+        self.path = path
+        self.retention = retention_hours * 3600
+        self.ticks = 0
+        self.pending = []
+        self.pending_lock = threading.Lock()
+        # Written from the sampling thread only; exports open their own connections
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def update(self, snapshot, previous=None):
+        """Queue one collector snapshot for the next flush()"""
+        # Snapshots are never modified after sampling, so keeping a reference is safe
+        with self.pending_lock:
+            self.pending.append(snapshot)
+
+    def flush(self):
+        """Write the queued snapshots and purge expired samples every PURGE_EVERY ticks"""
+        with self.pending_lock:
+            pending, self.pending = self.pending, []
+        for snapshot in pending:
+            t = snapshot.time
+            rows = zip(
+                [t] * len(snapshot), snapshot.pid, snapshot.name, snapshot.user, snapshot.cpu_percent,
+                snapshot.rss, snapshot.threads, snapshot.io_read, snapshot.io_write
+            )
+            with self.conn:
+                self.conn.executemany('INSERT INTO process_samples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+            self.ticks += 1
+            if self.ticks % PURGE_EVERY == 0:
+                self.purge(t - self.retention)
+
+    def record_system(self, stats):
+        """Append one get_system_stats() result"""
+        with self.conn:
+            self.conn.execute(
+                'INSERT INTO system_samples VALUES (?, ?, ?, ?, ?)',
+                (stats['time'] / 1000, stats['cpu'], stats['memory'], stats['disk'], stats['network'])
+            )
+
+    def purge(self, before):
+        """Delete samples older than before (epoch seconds)"""
+        with self.conn:
+            for table in TABLES.values():
+                self.conn.execute(f'DELETE FROM {table} WHERE time < ?', (before,))
+
+    def iter_rows(self, kind, start, end, pid=None, name=None):
+        """Yield matching rows in time order without loading the range into memory"""
+        query = f'SELECT {", ".join(COLUMNS[kind])} FROM {TABLES[kind]} WHERE time >= ? AND time <= ?'
+        params = [start, end]
+        if kind == 'processes' and pid is not None:
+            query += ' AND pid = ?'
+            params.append(pid)
+        if kind == 'processes' and name:
+            query += ' AND name = ?'
+            params.append(name)
+        query += ' ORDER BY time'
+
+        conn = sqlite3.connect(self.path)
+        try:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+    def export(self, kind, start=None, end=None, fmt='csv', compress=False, pid=None, name=None):
+        """Yield the export of a time range as encoded chunks (optionally gzip-compressed)"""
+        start = 0.0 if start is None else start
+        end = time.time() if end is None else end
+        chunks = encode_rows(COLUMNS[kind], self.iter_rows(kind, start, end, pid, name), fmt)
+        return gzip_chunks(chunks) if compress else chunks
+
+# ------------------ Encoding ------------------
+def encode_rows(columns, rows, fmt):
+    """Encode rows as CSV or NDJSON, yielding one bytes chunk per EXPORT_CHUNK_ROWS rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == 'csv':
+        # Send the header before the query has produced anything
+        writer.writerow(columns)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    count = 0
+    for row in rows:
+        row = (datetime.fromtimestamp(row[0]).isoformat(timespec='milliseconds'),) + tuple(row[1:])
+        if fmt == 'csv':
+            writer.writerow(row)
+        else:
+            buffer.write(json.dumps(dict(zip(columns, row))))
+            buffer.write('\n')
+        count += 1
+        if count % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def gzip_chunks(chunks):
+    """Gzip a stream of bytes chunks incrementally"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    first = True
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if first:
+            # Flush once so the client receives bytes before the first full block
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            first = False
+        if data:
+            yield data
+    yield compressor.flush()
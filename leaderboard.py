@@ -0,0 +1,119 @@
+"""Sliding-window top-N leaderboards for CPU, RSS growth, I/O and threads"""
+import heapq
+from bisect import bisect_left
+
+WINDOWS = {'1m': 60, '5m': 300, '15m': 900}
+METRICS = ('cpu', 'rss_growth', 'io', 'threads')
+CHECKPOINT_SECONDS = 10  # granularity of window boundaries
+MAX_WINDOW = max(WINDOWS.values())
+
+# ------------------ ProcessWindow ------------------
+class ProcessWindow:
+    """Running integrals of one process plus periodic checkpoints of them.
+
+    Every windowed metric is the difference between the current cumulative value
+    and the checkpoint at the window start, so a tick only adds to two integrals.
+    """
+    __slots__ = ('create_time', 'name', 'times', 'checkpoints', 'cpu_seconds', 'thread_seconds',
+                 'rss', 'io', 'last_time')
+
+    def __init__(self, create_time, name, now, rss, io):
+        self.create_time = create_time
+        self.name = name
+        self.cpu_seconds = 0.0
+        self.thread_seconds = 0.0
+        self.rss = rss
+        self.io = io
+        self.last_time = now
+        self.times = [now]
+        self.checkpoints = [(0.0, 0.0, rss, io)]
+
+    def advance(self, now, cpu_percent, threads, rss, io):
+        dt = now - self.last_time
+        self.cpu_seconds += cpu_percent * dt
+        self.thread_seconds += threads * dt
+        self.rss = rss
+        self.io = io
+        self.last_time = now
+        if now - self.times[-1] >= CHECKPOINT_SECONDS:
+            self.times.append(now)
+            self.checkpoints.append((self.cpu_seconds, self.thread_seconds, rss, io))
+            # Keep one checkpoint older than the widest window
+            expired = bisect_left(self.times, now - MAX_WINDOW) - 1
+            if expired > 0:
+                del self.times[:expired]
+                del self.checkpoints[:expired]
+
+    def values(self, window):
+        """Return (avg cpu %, rss growth, io bytes/s, avg threads) over the window, or None"""
+        i = bisect_left(self.times, self.last_time - window)
+        if i >= len(self.times):
+            i = len(self.times) - 1
+        elapsed = self.last_time - self.times[i]
+        if elapsed <= 0:
+            return None
+        cpu_seconds, thread_seconds, rss, io = self.checkpoints[i]
+        return (
+            (self.cpu_seconds - cpu_seconds) / elapsed,
+            self.rss - rss,
+            (self.io - io) / elapsed,
+            (self.thread_seconds - thread_seconds) / elapsed
+        )
+
+# ------------------ Leaderboards ------------------
+class Leaderboards:
+    """Collector tracker ranking processes over 1m/5m/15m sliding windows.
+
+    Per-tick maintenance is O(1) per process. Rankings use bounded heaps
+    (heapq.nlargest) and are computed at most once per tick and window, when
+    someone asks for them.
+    """
+
+    def __init__(self):
+        self.procs = {}
+        self.time = None
+        self.cache = {}
+
+    def update(self, snapshot, previous=None):
+        """Advance every process's integrals to this snapshot"""
+        now = snapshot.time
+        index = snapshot.index
+        procs = self.procs
+        for pid in [pid for pid in procs if pid not in index]:
+            del procs[pid]
+
+        cpu, threads, rss = snapshot.cpu_percent, snapshot.threads, snapshot.rss
+        io_read, io_write = snapshot.io_read, snapshot.io_write
+        for pid, i in index.items():
+            state = procs.get(pid)
+            io = io_read[i] + io_write[i]
+            if state is None or state.create_time != snapshot.create_time[i]:
+                procs[pid] = ProcessWindow(snapshot.create_time[i], snapshot.name[i], now, rss[i], io)
+            else:
+                state.advance(now, cpu[i], threads[i], rss[i], io)
+
+        self.time = now
+        self.cache = {}
+
+    def _rank(self, window, n):
+        key = (window, n)
+        if key not in self.cache:
+            seconds = WINDOWS[window]
+            rows = []
+            for pid, state in self.procs.items():
+                values = state.values(seconds)
+                if values is not None:
+                    rows.append((pid, state.name, values))
+            self.cache[key] = {
+                metric: [
+                    {'pid': pid, 'name': name, 'value': round(values[k], 1)}
+                    for pid, name, values in heapq.nlargest(n, rows, key=lambda row: row[2][k])
+                ]
+                for k, metric in enumerate(METRICS)
+            }
+        return self.cache[key]
+
+    def top(self, window='5m', n=5, metric=None):
+        """Return the top n processes for one metric, or every metric, over window"""
+        boards = self._rank(window, n)
+        return boards[metric] if metric else boards
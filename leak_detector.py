@@ -0,0 +1,175 @@
+"""Memory leak detection from per-process RSS trend regression"""
+import heapq
+import math
+import os
+
+TREND_SECONDS = 300       # time constant of the exponentially weighted regression
+MIN_OBSERVED = 180        # seconds a process must be watched before it can be ranked
+MIN_R2 = 0.8              # how linear the growth must be to count as sustained
+MIN_SLOPE = 1024          # bytes/s (~60 KB/min) below which growth is ignored
+SMAPS_INTERVAL = 30       # seconds between slow-tier smaps_rollup reads
+SMAPS_CANDIDATES = 20     # processes per slow-tier read, fastest RSS growth first
+
+# ------------------ TrendFit ------------------
+class TrendFit:
+    """Exponentially weighted least-squares line through (time, value) samples.
+
+    Keeps decayed sums of 1, t, x, t*t, t*x and x*x, so adding a sample and
+    reading the slope are both O(1). Times and values are kept relative to an
+    origin that is re-centred periodically to preserve float precision.
+    """
+    __slots__ = ('t0', 'x0', 'first', 'last', 'w', 'st', 'sx', 'stt', 'stx', 'sxx')
+
+    def __init__(self, t, x):
+        self.t0 = t
+        self.x0 = x
+        self.first = t
+        self.last = t
+        self.w = self.st = self.sx = self.stt = self.stx = self.sxx = 0.0
+        self.add(t, x)
+
+    def add(self, t, x):
+        decay = math.exp(-(t - self.last) / TREND_SECONDS)
+        if decay < 1.0:
+            self.w *= decay
+            self.st *= decay
+            self.sx *= decay
+            self.stt *= decay
+            self.stx *= decay
+            self.sxx *= decay
+        self.last = t
+
+        if t - self.t0 > 10 * TREND_SECONDS:
+            self._recentre(t)
+        t -= self.t0
+        x -= self.x0
+        self.w += 1
+        self.st += t
+        self.sx += x
+        self.stt += t * t
+        self.stx += t * x
+        self.sxx += x * x
+
+    def _recentre(self, t):
+        shift = t - self.t0
+        self.stt -= 2 * shift * self.st - shift * shift * self.w
+        self.stx -= shift * self.sx
+        self.st -= shift * self.w
+        self.t0 = t
+
+    def slope(self):
+        """Return the fitted growth rate in units per second"""
+        den = self.w * self.stt - self.st * self.st
+        return (self.w * self.stx - self.st * self.sx) / den if den > 0 else 0.0
+
+    def r2(self):
+        """Return the coefficient of determination of the fit"""
+        var_t = self.w * self.stt - self.st * self.st
+        var_x = self.w * self.sxx - self.sx * self.sx
+        if var_t <= 0 or var_x <= 0:
+            return 0.0
+        cov = self.w * self.stx - self.st * self.sx
+        return min(1.0, cov * cov / (var_t * var_x))
+
+    def observed(self):
+        return self.last - self.first
+
+def read_smaps_rollup(pid):
+    """Return (uss, pss) in bytes from /proc/<pid>/smaps_rollup, or None"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", 'rb') as f:
+            data = f.read()
+    except OSError:
+        return None
+    fields = {}
+    for line in data.split(b'\n')[1:]:
+        parts = line.split()
+        if len(parts) >= 2:
+            fields[parts[0]] = int(parts[1]) * 1024
+    return (fields.get(b'Private_Clean:', 0) + fields.get(b'Private_Dirty:', 0), fields.get(b'Pss:', 0))
+
+# ------------------ LeakDetector ------------------
+class LeakDetector:
+    """Collector tracker fitting an RSS trend per (pid, create_time) on every tick.
+
+    On Linux the fastest-growing candidates also get USS/PSS trends from
+    smaps_rollup every SMAPS_INTERVAL seconds, which separates private heap
+    growth from shared pages being faulted in.
+    """
+
+    def __init__(self, smaps=None):
+        self.smaps = os.path.exists('/proc/self/smaps_rollup') if smaps is None else smaps
+        # pid -> [create_time, name, rss, rss fit, uss fit, pss fit]
+        self.procs = {}
+        self.last_smaps = None
+
+    def update(self, snapshot, previous=None):
+        """Add this tick's RSS of every process to its trend"""
+        now = snapshot.time
+        index = snapshot.index
+        procs = self.procs
+        for pid in [pid for pid in procs if pid not in index]:
+            del procs[pid]
+
+        rss = snapshot.rss
+        for pid, i in index.items():
+            state = procs.get(pid)
+            if state is None or state[0] != snapshot.create_time[i]:
+                procs[pid] = [snapshot.create_time[i], snapshot.name[i], rss[i], TrendFit(now, rss[i]), None, None]
+            else:
+                state[2] = rss[i]
+                state[3].add(now, rss[i])
+
+        if self.smaps and (self.last_smaps is None or now - self.last_smaps >= SMAPS_INTERVAL):
+            self.last_smaps = now
+            self._sample_smaps(now)
+
+    def _sample_smaps(self, now):
+        growing = [(pid, state) for pid, state in self.procs.items() if state[3].slope() > MIN_SLOPE]
+        for pid, state in heapq.nlargest(SMAPS_CANDIDATES, growing, key=lambda item: item[1][3].slope()):
+            values = read_smaps_rollup(pid)
+            if values is None:
+                continue
+            uss, pss = values
+            if state[4] is None:
+                state[4] = TrendFit(now, uss)
+                state[5] = TrendFit(now, pss)
+            else:
+                state[4].add(now, uss)
+                state[5].add(now, pss)
+
+    def suspects(self, n=10, available=None):
+        """Rank processes with sustained RSS growth, fastest first.
+
+        available is the memory (bytes) left on the host; when given, each
+        suspect gets the seconds until its growth alone would exhaust it.
+        """
+        rows = []
+        for pid, state in self.procs.items():
+            fit = state[3]
+            if fit.observed() < MIN_OBSERVED:
+                continue
+            slope = fit.slope()
+            if slope < MIN_SLOPE:
+                continue
+            r2 = fit.r2()
+            if r2 < MIN_R2:
+                continue
+            rows.append((slope, pid, state, r2))
+
+        result = []
+        for slope, pid, state, r2 in heapq.nlargest(n, rows, key=lambda row: row[0]):
+            suspect = {
+                'pid': pid,
+                'name': state[1],
+                'rss': state[2],
+                'growth_bytes_per_min': round(slope * 60),
+                'r2': round(r2, 3),
+                'observed_seconds': round(state[3].observed()),
+                'time_to_oom_seconds': round(available / slope) if available is not None else None
+            }
+            if state[4] is not None and state[4].observed() >= MIN_OBSERVED:
+                suspect['uss_growth_bytes_per_min'] = round(state[4].slope() * 60)
+                suspect['pss_growth_bytes_per_min'] = round(state[5].slope() * 60)
+            result.append(suspect)
+        return result
@@ -0,0 +1,220 @@
+"""Capture of short-lived processes from exec/exit events or fast PID-set diffing"""
+import errno
+import socket
+import struct
+import threading
+import time
+from collections import deque
+import psutil
+
+SHORT_LIVED_SECONDS = 5   # processes exiting sooner than this are counted as short-lived
+RECENT_SECONDS = 60       # window for per-name rates
+POLL_INTERVAL = 0.2       # seconds between PID-set diffs in the fallback mode
+MAX_RECENT_EXITS = 100000
+
+# Linux proc connector (linux/connector.h, linux/cn_proc.h)
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+PROC_CN_MCAST_LISTEN = 1
+NLMSG_DONE = 3
+PROC_EVENT_FORK = 0x00000001
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_EXIT = 0x80000000
+NLMSG_HEADER = struct.Struct('=IHHII')
+CN_HEADER = struct.Struct('=IIIIHH')
+EVENT_HEADER = struct.Struct('=IIQ')
+PID_PAIR = struct.Struct('=II')
+EVENT_OFFSET = NLMSG_HEADER.size + CN_HEADER.size
+DATA_OFFSET = EVENT_OFFSET + EVENT_HEADER.size
+
+def read_comm(pid):
+    """Return a process name quickly, or None if it has already gone"""
+    try:
+        with open(f"/proc/{pid}/comm", 'rb') as f:
+            return f.read().rstrip(b'\n').decode(errors='replace')
+    except OSError:
+        pass
+    try:
+        return psutil.Process(pid).name()
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return None
+
+def open_proc_connector():
+    """Subscribe to kernel process events; raises OSError when not permitted (needs CAP_NET_ADMIN)"""
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        sock.bind((0, CN_IDX_PROC))
+        payload = CN_HEADER.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, 4, 0) + struct.pack('=I', PROC_CN_MCAST_LISTEN)
+        sock.send(NLMSG_HEADER.pack(NLMSG_HEADER.size + len(payload), NLMSG_DONE, 0, 0, sock.getsockname()[0]) + payload)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+# ------------------ ProcessEventMonitor ------------------
+class ProcessEventMonitor:
+    """Counts processes that start and exit between regular sampling ticks.
+
+    Uses the Linux proc connector (fork/exec/exit events) when the socket can be
+    opened, otherwise diffs the PID set every POLL_INTERVAL seconds. Only
+    processes born while the monitor runs are timed; exits within
+    SHORT_LIVED_SECONDS are aggregated by name. If recorder is given, each
+    short-lived exit is also added to it. If the event stream fails, capture
+    falls back to PID diffing; dropped counts socket overflows (lost events).
+    """
+
+    def __init__(self, recorder=None, short_lived_seconds=SHORT_LIVED_SECONDS):
+        self.recorder = recorder
+        self.short_lived_seconds = short_lived_seconds
+        self.mode = None
+        self.running = False
+        self.lock = threading.Lock()
+        # pid -> [start, name] for processes born in the last SHORT_LIVED_SECONDS
+        self.live = {}
+        self.last_expire = 0.0
+        # name -> [exits, total lifetime]
+        self.totals = {}
+        self.recent = deque(maxlen=MAX_RECENT_EXITS)
+        self.dropped = 0
+        self.scheduler = None
+
+    def start(self, scheduler=None):
+        """Start capturing in a daemon thread; scheduler paces the PID-diff fallback if given"""
+        self.scheduler = scheduler
+        try:
+            sock = open_proc_connector()
+            self.mode = 'proc_connector'
+            target, args = self._read_events, (sock,)
+        except (OSError, AttributeError):
+            # Not Linux, or not permitted to listen to the connector
+            self.mode = 'pid_diff'
+            target, args = self._poll_pids, ()
+        self.running = True
+        threading.Thread(target=target, args=args, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.running = False
+        if self.scheduler is not None:
+            self.scheduler.wake()
+
+    def _read_events(self, sock):
+        try:
+            self._read_loop(sock)
+            return
+        except Exception as e:
+            print(f"Error reading process events, falling back to PID diffing: {str(e)}")
+        finally:
+            sock.close()
+        self.mode = 'pid_diff'
+        self._poll_pids()
+
+    def _read_loop(self, sock):
+        sock.settimeout(1)
+        live = self.live
+        while self.running:
+            try:
+                data = sock.recv(65536)
+            except socket.timeout:
+                self._expire(time.monotonic())
+                continue
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    # Event storm overflowed the socket buffer; the lost exits are expired below
+                    self.dropped += 1
+                    continue
+                raise
+            now = time.monotonic()
+            offset = 0
+            while offset + DATA_OFFSET <= len(data):
+                length = NLMSG_HEADER.unpack_from(data, offset)[0]
+                if length < DATA_OFFSET or offset + length > len(data):
+                    break
+                what = EVENT_HEADER.unpack_from(data, offset + EVENT_OFFSET)[0]
+                body = offset + DATA_OFFSET
+                if what == PROC_EVENT_FORK:
+                    parent_tgid = PID_PAIR.unpack_from(data, body)[1]
+                    pid, tgid = PID_PAIR.unpack_from(data, body + 8)
+                    if pid == tgid:
+                        parent = live.get(parent_tgid)
+                        live[pid] = [now, parent[1] if parent else read_comm(pid)]
+                elif what == PROC_EVENT_EXEC:
+                    pid, tgid = PID_PAIR.unpack_from(data, body)
+                    state = live.get(tgid)
+                    if state is not None:
+                        state[1] = read_comm(tgid) or state[1]
+                elif what == PROC_EVENT_EXIT:
+                    pid, tgid = PID_PAIR.unpack_from(data, body)
+                    if pid == tgid:
+                        self._exited(pid, now)
+                offset += (length + 3) & ~3
+            self._expire(now)
+
+    def _poll_pids(self):
+        live = self.live
+        known = set(psutil.pids())
+        cost = 0.0
+        while self.running:
+            if self.scheduler is not None:
+                self.scheduler.wait(None, cost)
+            else:
+                time.sleep(POLL_INTERVAL)
+            started = time.thread_time()
+            now = time.monotonic()
+            pids = set(psutil.pids())
+            for pid in pids - known:
+                live[pid] = [now, read_comm(pid)]
+            for pid in known - pids:
+                self._exited(pid, now)
+            known = pids
+            self._expire(now)
+            cost = time.thread_time() - started
+
+    def _expire(self, now):
+        """Stop timing processes that have already outlived SHORT_LIVED_SECONDS"""
+        if now - self.last_expire < 1:
+            return
+        self.last_expire = now
+        cutoff = now - self.short_lived_seconds
+        for pid in [pid for pid, state in self.live.items() if state[0] < cutoff]:
+            del self.live[pid]
+
+    def _exited(self, pid, now):
+        state = self.live.pop(pid, None)
+        if state is None:
+            return
+        lifetime = now - state[0]
+        if lifetime >= self.short_lived_seconds:
+            return
+        name = state[1] or 'unknown'
+        with self.lock:
+            totals = self.totals.setdefault(name, [0, 0.0])
+            totals[0] += 1
+            totals[1] += lifetime
+            self.recent.append((now, name))
+        if self.recorder is not None:
+            self.recorder.record('exit', {'pid': pid, 'name': name, 'lifetime_ms': round(lifetime * 1000, 1)})
+
+    def short_lived(self, n=10, window=RECENT_SECONDS):
+        """Return the names with the most short-lived exits in the last window seconds"""
+        cutoff = time.monotonic() - window
+        with self.lock:
+            recent = {}
+            for t, name in reversed(self.recent):
+                if t < cutoff:
+                    break
+                recent[name] = recent.get(name, 0) + 1
+            rows = [
+                {
+                    'name': name,
+                    'count': count,
+                    'per_minute': round(count * 60 / window, 1),
+                    'total': self.totals[name][0],
+                    'avg_lifetime_ms': round(self.totals[name][1] * 1000 / self.totals[name][0], 1)
+                }
+                for name, count in recent.items()
+            ]
+        rows.sort(key=lambda row: row['count'], reverse=True)
+        return rows[:n]
@@ -8,13 +8,25 @@ import time
 import csv
 from datetime import datetime
 import platform
+from collector import ProcessCollector
+from process_tree import ProcessTree
+from leak_detector import LeakDetector
+from scheduler import AdaptiveScheduler
+from flight_recorder import FlightRecorder, FLIGHT_INTERVAL
+from proc_events import ProcessEventMonitor, POLL_INTERVAL
 
 # ------------------ Constants ------------------
 REFRESH_INTERVAL = 5000  # 5 seconds
+GRAPH_INTERVAL = 2       # seconds between graph samples while the window is shown
+GRAPH_BURST_INTERVAL = 0.5
 GRAPH_DATA_POINTS = 50
 ALERT_THRESHOLDS = {'cpu': 80, 'memory': 80, 'disk': 90, 'network': 80}
+CHURN_THRESHOLD = 30     # short-lived exits per minute of one name before alerting
 LOG_FILE = "process_monitor.log"
 
+# Headings whose values become subtree totals in tree mode
+SUBTREE_HEADINGS = {"CPU%": "CPU% (subtree)", "Memory (MB)": "Memory MB (subtree)", "Threads": "Threads (subtree)"}
+
 # ------------------ Utility Functions ------------------
 def log_action(message):
     """Log actions to a file with timestamp"""
@@ -32,6 +44,17 @@ def validate_priority(value):
 class ProcessMonitor:
     def __init__(self, root):
         self.root = root
+        self.tree_mode = False
+        self.expanded = set()
+        # Pids shown while searching in tree mode (matches and their ancestors), or None
+        self.tree_filter = None
+        self.collector = ProcessCollector()
+        self.process_tree = self.collector.register(ProcessTree())
+        self.leak_detector = self.collector.register(LeakDetector())
+        self.flight_recorder = self.collector.register(FlightRecorder())
+        self.process_events = ProcessEventMonitor(self.flight_recorder)
+        self.graph_scheduler = AdaptiveScheduler(GRAPH_INTERVAL, GRAPH_BURST_INTERVAL)
+        self.graph_visible = False
         self.setup_ui()
         self.setup_theme()
         self.running = True
@@ -55,6 +78,9 @@ class ProcessMonitor:
         # Create notebook for tabs
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill="both", expand=True)
+        self.notebook.bind("<<NotebookTabChanged>>", self.update_graph_demand)
+        self.root.bind("<Map>", self.update_graph_demand)
+        self.root.bind("<Unmap>", self.update_graph_demand)
         
         # Tab 1: Processes
         self.process_frame = ttk.Frame(self.notebook)
@@ -108,6 +134,7 @@ class ProcessMonitor:
         ttk.Button(btn_frame, text="Pause Updates", command=self.toggle_pause).pack(side="left", padx=2)
         ttk.Button(btn_frame, text="Export CSV", command=self.export_csv).pack(side="left", padx=2)
         ttk.Button(btn_frame, text="Mute Alerts", command=self.toggle_mute_alerts).pack(side="left", padx=2)
+        ttk.Button(btn_frame, text="Tree View", command=self.toggle_tree_mode).pack(side="left", padx=2)
         
         # Process treeview
         self.tree_frame = ttk.Frame(self.process_frame)
@@ -119,6 +146,10 @@ class ProcessMonitor:
         for col in columns:
             self.tree.heading(col, text=col)
             self.tree.column(col, anchor="center", width=100)
+        self.tree.heading("#0", text="Process Tree")
+        self.tree.column("#0", width=250)
+        self.tree.bind("<<TreeviewOpen>>", self.on_tree_open)
+        self.tree.bind("<<TreeviewClose>>", self.on_tree_close)
         
         self.tree.pack(fill="both", expand=True, side="left")
         
@@ -221,20 +252,27 @@ class ProcessMonitor:
         """Start background threads for monitoring"""
         self.graph_thread = threading.Thread(target=self.update_graph, daemon=True)
         self.graph_thread.start()
+        # Both follow the graph loop's demand and share its CPU budget
+        self.flight_recorder.start(self.graph_scheduler.follower(FLIGHT_INTERVAL))
+        self.process_events.start(self.graph_scheduler.follower(POLL_INTERVAL))
 
     def get_processes(self):
-        """Get list of processes with detailed information"""
-        process_list = []
-        for proc in psutil.process_iter(attrs=['pid', 'name', 'cpu_percent', 'memory_info', 'username', 'nice', 'num_threads']):
-            try:
-                info = proc.info
-                info['username'] = info.get('username', "N/A")
-                info['memory_info'] = info['memory_info'].rss // 1024**2 if info['memory_info'] else 0
-                info['num_threads'] = info.get('num_threads', 0)
-                process_list.append(info)
-            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                log_action(f"Process skipped: {e}")
-        return process_list
+        """Get list of processes with detailed information from the latest collector snapshot"""
+        # A second process_iter scan would share psutil's cpu_percent state with the
+        # collector and measure CPU over the milliseconds between the two scans
+        snapshot = self.collector.latest()
+        return [
+            {
+                'pid': snapshot.pid[i],
+                'name': snapshot.name[i],
+                'username': snapshot.user[i],
+                'cpu_percent': snapshot.cpu_percent[i],
+                'memory_info': snapshot.rss[i] // 1024**2,
+                'nice': snapshot.nice[i],
+                'num_threads': snapshot.threads[i]
+            }
+            for i in range(len(snapshot))
+        ]
 
     def update_process_list(self):
         """Update the process list in the UI"""
@@ -242,40 +280,128 @@ class ProcessMonitor:
             self.root.after(REFRESH_INTERVAL, self.update_process_list)
             return
         
+        self.refresh_processes()
+        self.root.after(REFRESH_INTERVAL, self.update_process_list)
+
+    def refresh_processes(self):
+        """Redraw the process view once in the current mode"""
         try:
-            self.tree.delete(*self.tree.get_children())
-            processes = self.get_processes()
-            
-            search_text = self.search_var.get().lower()
-            search_by = self.search_by.get().lower()
-            
-            for process in processes:
-                # Apply search filter
-                if search_text:
-                    if search_by == "name" and search_text not in process['name'].lower():
-                        continue
-                    elif search_by == "pid" and search_text not in str(process['pid']):
-                        continue
-                    elif search_by == "user" and search_text not in process['username'].lower():
-                        continue
-                
-                self.tree.insert("", "end", values=(
-                    process['pid'], 
-                    process['name'], 
-                    process['username'], 
-                    f"{process['cpu_percent']:.1f}",
-                    process['memory_info'], 
-                    process['nice'], 
-                    process['num_threads']
-                ))
+            # One scan per refresh feeds both views and the leak trends
+            self.collector.sample()
+            if self.tree_mode:
+                self.update_process_tree()
+            else:
+                self.update_flat_list()
             
             self.check_alerts()
             self.status_var.set(f"Last updated: {datetime.now().strftime('%H:%M:%S')}")
         except Exception as e:
             log_action(f"Error updating process list: {e}")
             self.status_var.set(f"Error: {str(e)}")
-        
-        self.root.after(REFRESH_INTERVAL, self.update_process_list)
+
+    def update_flat_list(self):
+        """Rebuild the flat process list, applying the search filter"""
+        self.tree.delete(*self.tree.get_children())
+        processes = self.get_processes()
+        
+        for process in processes:
+            # Apply search filter
+            if not self.matches_search(process['pid'], process['name'], process['username']):
+                continue
+            
+            self.tree.insert("", "end", values=(
+                process['pid'], 
+                process['name'], 
+                process['username'], 
+                f"{process['cpu_percent']:.1f}",
+                process['memory_info'], 
+                process['nice'], 
+                process['num_threads']
+            ))
+
+    def matches_search(self, pid, name, user):
+        """Whether a process passes the search box filter"""
+        search_text = self.search_var.get().lower()
+        if not search_text:
+            return True
+        search_by = self.search_by.get().lower()
+        if search_by == "name":
+            return search_text in name.lower()
+        if search_by == "pid":
+            return search_text in str(pid)
+        if search_by == "user":
+            return search_text in user.lower()
+        return True
+
+    def update_process_tree(self):
+        """Rebuild the tree view from the collector, keeping expanded nodes open"""
+        nodes = self.process_tree.nodes
+        self.expanded &= set(nodes)
+        self.tree_filter = None
+        if self.search_var.get():
+            # Show every match together with the ancestors leading to it
+            self.tree_filter = set()
+            for node in nodes.values():
+                if node.pid in self.tree_filter or not self.matches_search(node.pid, node.name, node.user):
+                    continue
+                while node is not None and node.pid not in self.tree_filter:
+                    self.tree_filter.add(node.pid)
+                    node = node.parent
+        self.tree.delete(*self.tree.get_children())
+        self.insert_tree_children("", None)
+
+    def insert_tree_children(self, parent_iid, pid):
+        """Insert the children of pid (or the roots) showing subtree totals"""
+        for node in self.process_tree.children(pid) or []:
+            if self.tree_filter is not None and node['pid'] not in self.tree_filter:
+                continue
+            iid = str(node['pid'])
+            subtree = node['subtree']
+            self.tree.insert(parent_iid, "end", iid=iid, text=f"{node['name']} ({subtree['processes']})", values=(
+                node['pid'],
+                node['name'],
+                node['user'],
+                f"{subtree['cpu_percent']:.1f}",
+                subtree['rss'] // 1024**2,
+                "",
+                subtree['threads']
+            ))
+            if not node['has_children']:
+                continue
+            # While searching, open every branch that leads to a match
+            if node['pid'] in self.expanded or self.tree_filter is not None:
+                self.insert_tree_children(iid, node['pid'])
+                self.tree.item(iid, open=True)
+            else:
+                # Placeholder so the expand arrow shows; real children load on open
+                self.tree.insert(iid, "end", iid=f"{iid}-placeholder")
+
+    def on_tree_open(self, event=None):
+        """Lazily load the children of the node being expanded"""
+        if not self.tree_mode:
+            return
+        iid = self.tree.focus()
+        if not iid or not iid.isdigit():
+            return
+        pid = int(iid)
+        self.expanded.add(pid)
+        self.tree.delete(*self.tree.get_children(iid))
+        self.insert_tree_children(iid, pid)
+
+    def on_tree_close(self, event=None):
+        """Forget collapsed nodes so they are not expanded on the next refresh"""
+        iid = self.tree.focus()
+        if self.tree_mode and iid.isdigit():
+            self.expanded.discard(int(iid))
+
+    def toggle_tree_mode(self):
+        """Toggle between the flat process list and the process tree"""
+        self.tree_mode = not self.tree_mode
+        self.tree.configure(show="tree headings" if self.tree_mode else "headings")
+        for col, subtree_heading in SUBTREE_HEADINGS.items():
+            self.tree.heading(col, text=subtree_heading if self.tree_mode else col)
+        self.refresh_processes()
+        self.status_var.set("Tree view enabled" if self.tree_mode else "Flat view enabled")
 
     def debounced_filter(self, event=None):
         """Debounce the filter to avoid rapid updates"""
@@ -360,9 +486,20 @@ User: {process.username()}
             self.tree.selection_set(item)
             self.tree_menu.post(event.x_root, event.y_root)
     
+    def update_graph_demand(self, event=None):
+        """Sample at full rate only while the window is shown, and draw only on the Performance tab"""
+        try:
+            shown = self.root.state() != "iconic"
+            self.graph_visible = shown and self.notebook.select() == str(self.perf_frame)
+        except tk.TclError:
+            return
+        self.graph_scheduler.set_subscribers(1 if shown and not self.paused else 0)
+
     def update_graph(self):
         """Update the performance graphs"""
         while self.running:
+            started = time.thread_time()
+            metrics = None
             if not self.paused:
                 try:
                     # Get system metrics
@@ -370,6 +507,7 @@ User: {process.username()}
                     mem = psutil.virtual_memory().percent
                     disk = psutil.disk_usage('/').percent
                     net = psutil.net_io_counters().bytes_sent + psutil.net_io_counters().bytes_recv
+                    metrics = {'cpu': cpu, 'memory': mem, 'disk': disk}
                     
                     # Store data
                     self.cpu_usage.append(cpu)
@@ -384,27 +522,33 @@ User: {process.username()}
                         self.disk_usage.pop(0)
                         self.net_usage.pop(0)
                     
-                    # Update graphs
-                    self.ax1.clear()
-                    self.ax2.clear()
-                    self.ax3.clear()
-                    self.ax4.clear()
-                    
-                    # Store the line objects for hover detection
-                    self.ax1.plot(self.cpu_usage, color="red", label="CPU Usage (%)")
-                    self.ax2.plot(self.mem_usage, color="blue", label="Memory Usage (%)")
-                    self.ax3.plot(self.disk_usage, color="green", label="Disk Usage (%)")
-                    self.ax4.plot(self.net_usage, color="purple", label="Network Bytes")
-                    
-                    for ax in [self.ax1, self.ax2, self.ax3, self.ax4]:
-                        ax.legend(loc="upper right")
-                        ax.grid(True, alpha=0.3)
-                    
-                    self.canvas.draw()
+                    # Keep the series current, but only draw while the tab is open
+                    if self.graph_visible:
+                        self.draw_graphs()
                 except Exception as e:
                     log_action(f"Error updating graphs: {e}")
             
-            time.sleep(2)
+            self.graph_scheduler.wait(metrics, time.thread_time() - started)
+
+    def draw_graphs(self):
+        """Redraw the performance graphs from the stored series"""
+        # Update graphs
+        self.ax1.clear()
+        self.ax2.clear()
+        self.ax3.clear()
+        self.ax4.clear()
+
+        # Store the line objects for hover detection
+        self.ax1.plot(self.cpu_usage, color="red", label="CPU Usage (%)")
+        self.ax2.plot(self.mem_usage, color="blue", label="Memory Usage (%)")
+        self.ax3.plot(self.disk_usage, color="green", label="Disk Usage (%)")
+        self.ax4.plot(self.net_usage, color="purple", label="Network Bytes")
+
+        for ax in [self.ax1, self.ax2, self.ax3, self.ax4]:
+            ax.legend(loc="upper right")
+            ax.grid(True, alpha=0.3)
+
+        self.canvas.draw()
 
     def check_alerts(self):
         """Check for system alerts"""
@@ -415,18 +559,42 @@ User: {process.username()}
             cpu = psutil.cpu_percent()
             mem = psutil.virtual_memory().percent
             disk = psutil.disk_usage('/').percent
+            alerts = {}
             
             if cpu > self.cpu_thresh.get():
                 self.status_var.set(f"High CPU Usage: {cpu}% (Threshold: {self.cpu_thresh.get()}%)")
                 log_action(f"High CPU alert: {cpu}%")
+                alerts['cpu'] = "high cpu"
             
             if mem > self.mem_thresh.get():
                 self.status_var.set(f"High Memory Usage: {mem}% (Threshold: {self.mem_thresh.get()}%)")
                 log_action(f"High Memory alert: {mem}%")
+                alerts['memory'] = "high memory"
             
             if disk > ALERT_THRESHOLDS['disk']:
                 self.status_var.set(f"High Disk Usage: {disk}% (Threshold: {ALERT_THRESHOLDS['disk']}%)")
                 log_action(f"High Disk alert: {disk}%")
+                alerts['disk'] = "high disk"
+            
+            # Warn about steady leaks long before the system-wide threshold is reached
+            for suspect in self.leak_detector.suspects(1, psutil.virtual_memory().available):
+                growth = suspect['growth_bytes_per_min'] / 1024**2
+                minutes = suspect['time_to_oom_seconds'] / 60
+                self.status_var.set(f"Possible memory leak: {suspect['name']} ({suspect['pid']}) +{growth:.1f} MB/min, memory exhausted in ~{minutes:.0f} min")
+                log_action(f"Memory leak alert: {suspect['name']} ({suspect['pid']}) +{growth:.1f} MB/min, ~{minutes:.0f} min to OOM")
+                alerts[('leak', suspect['pid'])] = f"leak {suspect['name']}"
+            
+            # Crash loops and fork storms never show up in the process list itself
+            for churn in self.process_events.short_lived(1):
+                if churn['per_minute'] >= CHURN_THRESHOLD:
+                    self.status_var.set(f"Process churn: {churn['name']} exited {churn['count']} times in the last minute (avg {churn['avg_lifetime_ms']:.0f} ms)")
+                    log_action(f"Process churn alert: {churn['name']} {churn['per_minute']}/min")
+                    alerts[('churn', churn['name'])] = f"churn {churn['name']}"
+            
+            # Dump only when an alert starts, not on every check while it persists
+            path = self.flight_recorder.update_alerts(alerts)
+            if path:
+                log_action(f"Flight recording written to {path}")
         except Exception as e:
             log_action(f"Error checking alerts: {e}")
 
@@ -442,6 +610,7 @@ User: {process.username()}
     def toggle_pause(self):
         """Toggle pause state"""
         self.paused = not self.paused
+        self.update_graph_demand()
         self.status_var.set("Updates paused" if self.paused else "Resumed updates")
 
     def toggle_mute_alerts(self):
@@ -461,10 +630,13 @@ User: {process.username()}
             if filename:
                 with open(filename, 'w', newline='') as f:
                     writer = csv.writer(f)
-                    writer.writerow(["PID", "Name", "User", "CPU%", "Memory (MB)", "Priority", "Threads"])
-                    
-                    for item in self.tree.get_children():
-                        writer.writerow(self.tree.item(item)['values'])
+                    if self.tree_mode:
+                        self.write_tree_csv(writer)
+                    else:
+                        writer.writerow(["PID", "Name", "User", "CPU%", "Memory (MB)", "Priority", "Threads"])
+                        
+                        for item in self.tree.get_children():
+                            writer.writerow(self.tree.item(item)['values'])
                 
                 self.status_var.set(f"Process list exported to {filename}")
                 log_action(f"Exported process list to {filename}")
@@ -472,9 +644,27 @@ User: {process.username()}
             self.status_var.set(f"Export failed: {e}")
             log_action(f"Export error: {e}")
 
+    def write_tree_csv(self, writer):
+        """Write every process in the tree (or the current search) with own and subtree values"""
+        writer.writerow(["PID", "PPID", "Name", "User", "CPU%", "Memory (MB)", "Threads",
+                         "Subtree CPU%", "Subtree Memory (MB)", "Subtree Threads", "Subtree Processes"])
+        for pid in sorted(self.process_tree.nodes):
+            if self.tree_filter is not None and pid not in self.tree_filter:
+                continue
+            node = self.process_tree.node(pid)
+            subtree = node['subtree']
+            writer.writerow([
+                node['pid'], node['ppid'], node['name'], node['user'],
+                node['cpu_percent'], node['rss'] // 1024**2, node['threads'],
+                subtree['cpu_percent'], subtree['rss'] // 1024**2, subtree['threads'], subtree['processes']
+            ])
+
     def on_close(self):
         """Cleanup on window close"""
         self.running = False
+        self.graph_scheduler.wake()
+        self.flight_recorder.stop()
+        self.process_events.stop()
         if hasattr(self, 'graph_thread'):
             self.graph_thread.join(timeout=1)
         self.root.destroy()
@@ -0,0 +1,164 @@
+"""Parent/child process graph with per-subtree resource rollups"""
+
+# Order of the per-node value vectors
+FIELDS = ('cpu_percent', 'rss', 'threads', 'io_read', 'io_write', 'count')
+SORT_KEYS = {field: i for i, field in enumerate(FIELDS)}
+
+# ------------------ TreeNode ------------------
+class TreeNode:
+    __slots__ = ('pid', 'ppid', 'create_time', 'name', 'user', 'parent', 'children', 'own', 'total')
+
+    def __init__(self, pid, ppid, create_time, name, user):
+        self.pid = pid
+        self.ppid = ppid
+        self.create_time = create_time
+        self.name = name
+        self.user = user
+        self.parent = None
+        self.children = set()
+        # Values start at zero and are brought up to date by the delta pass
+        self.own = [0.0] * len(FIELDS)
+        self.total = [0.0] * len(FIELDS)
+
+    def to_dict(self):
+        return {
+            'pid': self.pid,
+            'ppid': self.ppid,
+            'name': self.name,
+            'user': self.user,
+            'cpu_percent': round(self.own[0], 1),
+            'rss': int(self.own[1]),
+            'threads': int(self.own[2]),
+            'io_read': int(self.own[3]),
+            'io_write': int(self.own[4]),
+            'subtree': {
+                'cpu_percent': round(max(0.0, self.total[0]), 1),
+                'rss': int(self.total[1]),
+                'threads': int(self.total[2]),
+                'io_read': int(self.total[3]),
+                'io_write': int(self.total[4]),
+                'processes': int(self.total[5])
+            },
+            'has_children': bool(self.children)
+        }
+
+# ------------------ ProcessTree ------------------
+class ProcessTree:
+    """Incrementally maintained process tree.
+
+    The graph is only restructured when processes fork, exit or get re-parented.
+    Each tick the change in a process's own values is added to its subtree total
+    and to every ancestor's, so rollups never require a full rescan.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.roots = set()
+
+    def update(self, snapshot, previous=None):
+        """Apply one collector snapshot to the tree"""
+        nodes = self.nodes
+        index = snapshot.index
+
+        # Exits (including pid reuse, detected by a new create_time)
+        for pid in [pid for pid, node in nodes.items()
+                    if pid not in index or snapshot.create_time[index[pid]] != node.create_time]:
+            self._remove(nodes[pid])
+
+        # Forks: create every new node before linking so chains born within one tick resolve
+        added = []
+        for pid, i in index.items():
+            if pid not in nodes:
+                node = TreeNode(pid, snapshot.ppid[i], snapshot.create_time[i], snapshot.name[i], snapshot.user[i])
+                nodes[pid] = node
+                self.roots.add(pid)
+                added.append(node)
+        for node in added:
+            self._link(node)
+
+        # Re-parenting of orphans (e.g. adopted by init or a subreaper)
+        for pid, i in index.items():
+            node = nodes[pid]
+            ppid = snapshot.ppid[i]
+            if ppid != node.ppid:
+                node.ppid = ppid
+                self._unlink(node)
+                self._link(node)
+
+        # Propagate per-process value changes up the ancestor chain
+        cpu, rss, threads = snapshot.cpu_percent, snapshot.rss, snapshot.threads
+        io_read, io_write = snapshot.io_read, snapshot.io_write
+        for pid, i in index.items():
+            node = nodes[pid]
+            own = node.own
+            new = (cpu[i], rss[i], threads[i], io_read[i], io_write[i], 1)
+            delta = [new[k] - own[k] for k in range(len(FIELDS))]
+            if any(delta):
+                node.own = list(new)
+                self._propagate(node, delta)
+
+    def _propagate(self, node, delta):
+        while node is not None:
+            total = node.total
+            for k, d in enumerate(delta):
+                total[k] += d
+            node = node.parent
+
+    def _link(self, node):
+        parent = self.nodes.get(node.ppid)
+        # Guard against pid 0 being its own parent and against cycles from racy ppid reads
+        if parent is None or parent is node or self._is_ancestor(node, parent):
+            return
+        self.roots.discard(node.pid)
+        parent.children.add(node.pid)
+        node.parent = parent
+        self._propagate(parent, node.total)
+
+    def _unlink(self, node):
+        parent = node.parent
+        if parent is None:
+            return
+        parent.children.discard(node.pid)
+        node.parent = None
+        self.roots.add(node.pid)
+        self._propagate(parent, [-v for v in node.total])
+
+    def _is_ancestor(self, node, other):
+        while other is not None:
+            if other is node:
+                return True
+            other = other.parent
+        return False
+
+    def _remove(self, node):
+        # The whole subtree leaves the ancestors; live children become roots
+        # until the snapshot shows who adopted them
+        self._propagate(node.parent, [-v for v in node.total])
+        if node.parent is not None:
+            node.parent.children.discard(node.pid)
+        for child_pid in node.children:
+            child = self.nodes[child_pid]
+            child.parent = None
+            self.roots.add(child_pid)
+        del self.nodes[node.pid]
+        self.roots.discard(node.pid)
+
+    def children(self, pid=None, sort='cpu_percent', limit=None):
+        """Return the direct children of pid (or the roots) sorted by subtree total"""
+        if pid is None:
+            pids = self.roots
+        else:
+            node = self.nodes.get(pid)
+            if node is None:
+                return None
+            pids = node.children
+        key = SORT_KEYS.get(sort, 0)
+        result = sorted((self.nodes[p] for p in pids), key=lambda n: n.total[key], reverse=True)
+        if limit:
+            result = result[:limit]
+        return [node.to_dict() for node in result]
+
+    def node(self, pid):
+        """Return a single node with its rollups, or None"""
+        node = self.nodes.get(pid)
+        return node.to_dict() if node is not None else None
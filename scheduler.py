@@ -0,0 +1,151 @@
+"""Adaptive sampling intervals driven by subscribers, system activity and a CPU budget"""
+import os
+import threading
+import time
+
+# Seconds between ticks with nobody watching; 0 stops sampling until someone subscribes
+IDLE_INTERVAL = float(os.getenv('PROCESS_MONITOR_IDLE_INTERVAL', '10')) or None
+# Share of one core the sampling loop may spend on itself
+CPU_BUDGET = float(os.getenv('PROCESS_MONITOR_CPU_BUDGET', '0.05'))
+
+# Levels that put the sampler into burst mode (matching the Tk alert defaults)
+BURST_THRESHOLDS = {'cpu': 80, 'memory': 80, 'disk': 90}
+# Tick-to-tick changes that count as "moving quickly"
+BURST_CHANGES = {'cpu': 25, 'memory': 5, 'disk': 2}
+BURST_COOLDOWN = 60  # seconds after a burst before another can start
+DEMAND_SECONDS = 60  # seconds an API request keeps sampling at the normal interval
+
+# ------------------ AdaptiveScheduler ------------------
+class AdaptiveScheduler:
+    """Decides how long a sampling loop sleeps before its next tick.
+
+    - No subscribers and no request() in the last DEMAND_SECONDS: heartbeat
+      every idle_interval seconds, or block until a subscriber or request
+      arrives when idle_interval is None.
+    - A metric crossing above BURST_THRESHOLDS or jumping by BURST_CHANGES:
+      sample every burst_interval seconds for burst_seconds, then not again
+      for BURST_COOLDOWN seconds.
+    - Otherwise: every interval seconds.
+
+    Whatever the mode, the interval is stretched so the loop's own CPU time
+    stays within cpu_budget (a fraction of one core).
+
+    Secondary loops get a follower(): it keeps its own interval whether or not
+    anyone is watching, shares this scheduler's bursts, and takes its CPU
+    budget out of this one's, so all loops together stay within the
+    configured budget.
+    """
+
+    def __init__(self, interval=1.0, burst_interval=0.25, idle_interval=IDLE_INTERVAL, cpu_budget=CPU_BUDGET,
+                 burst_seconds=10, thresholds=BURST_THRESHOLDS, changes=BURST_CHANGES, cooldown=BURST_COOLDOWN):
+        self.interval = interval
+        self.burst_interval = burst_interval
+        self.idle_interval = idle_interval
+        self.cpu_budget = cpu_budget
+        self.burst_seconds = burst_seconds
+        self.thresholds = thresholds
+        self.changes = changes
+        self.cooldown = cooldown
+        self.subscribers = 0
+        self.demand_until = 0.0
+        self.burst_until = 0.0
+        self.next_burst = 0.0
+        self.previous = None
+        self.cost = 0.0
+        self.current_interval = interval
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.leader = None
+        self.followers = []
+
+    def follower(self, interval, burst_interval=None, share=0.1):
+        """Return a scheduler for a secondary loop that spends share of this one's CPU budget"""
+        follower = AdaptiveScheduler(interval, burst_interval or interval, None,
+                                     self.cpu_budget * share if self.cpu_budget else 0)
+        follower.leader = self
+        with self.lock:
+            self.cpu_budget -= follower.cpu_budget
+            self.followers.append(follower)
+        return follower
+
+    def subscribe(self):
+        """Register a consumer and wake the loop so it resumes immediately"""
+        with self.lock:
+            self.subscribers += 1
+        self.wake()
+
+    def unsubscribe(self):
+        with self.lock:
+            self.subscribers = max(0, self.subscribers - 1)
+
+    def set_subscribers(self, count):
+        with self.lock:
+            woke = count > self.subscribers
+            self.subscribers = count
+        if woke:
+            self.wake()
+
+    def request(self):
+        """Count a one-off reader (e.g. a REST call) as demand; return whether the loop was idle and got woken"""
+        now = time.monotonic()
+        with self.lock:
+            idle = self.subscribers == 0 and now >= self.demand_until
+            self.demand_until = now + DEMAND_SECONDS
+        if idle:
+            self.wake()
+        return idle
+
+    def wake(self):
+        """Cut the current wait short (e.g. on shutdown)"""
+        self.wakeup.set()
+        for follower in self.followers:
+            follower.wake()
+
+    def next_interval(self, metrics=None, cost=0.0):
+        """Return the seconds until the next tick, or None to wait for demand (leaders only).
+
+        metrics is the latest sample (a dict with any of the BURST_THRESHOLDS keys)
+        and cost the CPU seconds the tick itself used.
+        """
+        now = time.monotonic()
+        # Smooth the measured cost so one slow tick does not stall sampling
+        self.cost = cost if self.cost == 0.0 else 0.8 * self.cost + 0.2 * cost
+
+        if metrics:
+            if self._is_active(metrics) and now >= self.next_burst:
+                self.burst_until = now + self.burst_seconds
+                self.next_burst = self.burst_until + self.cooldown
+            self.previous = metrics
+
+        leader = self.leader or self
+        # Followers record continuously, so only the leader idles without demand
+        if self.leader is None and self.subscribers == 0 and now >= self.demand_until:
+            interval = self.idle_interval
+        elif now < leader.burst_until:
+            interval = self.burst_interval
+        else:
+            interval = self.interval
+
+        if interval is not None and self.cpu_budget:
+            interval = max(interval, self.cost / self.cpu_budget)
+        self.current_interval = interval
+        return interval
+
+    def _is_active(self, metrics):
+        """Whether a metric has just crossed its threshold or moved sharply since the last tick"""
+        previous = self.previous
+        if previous is None:
+            return False
+        for key, threshold in self.thresholds.items():
+            # Edge-triggered: a value that stays high is not new activity
+            if metrics.get(key, 0) >= threshold > previous.get(key, 0):
+                return True
+        for key, change in self.changes.items():
+            if abs(metrics.get(key, 0) - previous.get(key, 0)) >= change:
+                return True
+        return False
+
+    def wait(self, metrics=None, cost=0.0):
+        """Sleep until the next tick is due or demand arrives"""
+        self.wakeup.wait(self.next_interval(metrics, cost))
+        self.wakeup.clear()
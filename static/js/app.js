@@ -84,6 +84,9 @@ let currentSort = { column: null, direction: 1 };
 let updatesEnabled = true;
 let alertsEnabled = true;
 let searchTerm = '';
+let groupBy = '';
+let groupSort = 'rss';
+let liveAnomalies = {};
 
 // Tab switching functionality
 function switchTab(tabName) {
@@ -140,6 +143,11 @@ function switchTab(tabName) {
         'active-tab'
     );
 
+    // The virtualized table measures its viewport, so re-render once it is visible
+    if (tabName === 'processes') {
+        scheduleTableRender();
+    }
+
     // Resize charts if switching to graphs tab
     if (tabName === 'graphs') {
         [cpuChart, memoryChart, diskChart, networkChart].forEach(chart => {
@@ -150,9 +158,14 @@ function switchTab(tabName) {
 
 // Function to fetch and update processes
 async function refreshProcesses() {
+    if (groupBy) {
+        return refreshGroups();
+    }
     try {
         const response = await axios.get('/processes');  // Remove hardcoded localhost:5000
         processes = response.data;
+        // The server now annotates flagged rows itself
+        liveAnomalies = {};
         
         // Maintain current search filter and sort
         if (searchTerm && searchTerm !== '') {
@@ -245,66 +258,253 @@ function sortTable(column) {
     updateProcessTable(processesToSort);
 }
 
+// Virtualized process table: only rows in view exist in the DOM, keyed and patched by PID
+const ROW_BUFFER = 10;
+const CELL_CLASS = 'px-6 py-4 whitespace-nowrap';
+const renderedRows = new Map();
+let rowHeight = 53;
+let tableRows = [];
+let tableRenderScheduled = false;
+let topSpacer = null;
+let bottomSpacer = null;
+
 // Function to update the process table
 function updateProcessTable(processesToShow = processes) {
-    const tableBody = document.getElementById('processTable');
-    if (!tableBody) return;
-
-    tableBody.innerHTML = '';
-    
     if (!Array.isArray(processesToShow)) {
         console.error('processesToShow is not an array:', processesToShow);
         return;
     }
+    tableRows = processesToShow.filter(process => process);
+    scheduleTableRender();
+}
 
-    processesToShow.forEach(process => {
-        if (!process) return;
-        
-        const row = document.createElement('tr');
-        row.className = 'dark:text-gray-300 hover:bg-gray-50 dark:hover:bg-gray-800 cursor-pointer';
-        if (process.pid === selectedPid) {
-            row.classList.add('bg-blue-100', 'dark:bg-blue-900');
+// Function to coalesce table renders into one per animation frame
+function scheduleTableRender() {
+    if (tableRenderScheduled) return;
+    tableRenderScheduled = true;
+    requestAnimationFrame(() => {
+        tableRenderScheduled = false;
+        renderVisibleRows();
+    });
+}
+
+// Function to create an empty row for a process; cells are filled by patchProcessRow
+function createProcessRow(pid) {
+    const row = document.createElement('tr');
+    row.className = 'dark:text-gray-300 hover:bg-gray-50 dark:hover:bg-gray-800 cursor-pointer';
+    row.dataset.pid = pid;
+    for (let i = 0; i < 7; i++) {
+        const cell = document.createElement('td');
+        cell.className = CELL_CLASS;
+        row.appendChild(cell);
+    }
+    const actions = document.createElement('td');
+    actions.className = CELL_CLASS;
+    actions.innerHTML = `
+        <div class="flex space-x-2">
+            <button data-action="kill"
+                    class="px-3 py-1 bg-red-500 text-white rounded hover:bg-red-600 dark:bg-red-600 dark:hover:bg-red-700">
+                Kill
+            </button>
+            <button data-action="analyze"
+                    class="px-3 py-1 bg-indigo-500 text-white rounded hover:bg-indigo-600 dark:bg-indigo-600 dark:hover:bg-indigo-700">
+                Analyze
+            </button>
+        </div>
+    `;
+    row.appendChild(actions);
+    return row;
+}
+
+// Function to write a cell only when its text actually changed
+function patchCell(cell, text) {
+    if (cell.textContent !== text) {
+        cell.textContent = text;
+    }
+}
+
+// Function to bring a row's cells up to date with a process
+function patchProcessRow(row, process) {
+    const cells = row.children;
+    patchCell(cells[0], `${process.pid || ''}`);
+    patchNameCell(cells[1], process);
+    patchCell(cells[2], process.cpu_percent?.toFixed(1) || '0');
+    patchCell(cells[3], process.memory_percent?.toFixed(1) || '0');
+    patchCell(cells[4], process.user || '');
+    patchCell(cells[5], `${process.threads || '0'}`);
+    patchCell(cells[6], process.start_time || '');
+
+    const selected = process.pid === selectedPid;
+    row.classList.toggle('bg-blue-100', selected);
+    row.classList.toggle('dark:bg-blue-900', selected);
+}
+
+// Function to render the name cell with its anomaly marker
+function patchNameCell(cell, process) {
+    const anomalies = process.anomalies || liveAnomalies[process.pid] || [];
+    const title = anomalies.map(a => `${a.kind}: ${a.metric} ${a.value} (baseline ${a.baseline})`).join('\n');
+    const key = `${process.name || ''}\u0000${title}`;
+    if (cell.dataset.key === key) return;
+    cell.dataset.key = key;
+
+    cell.textContent = process.name || '';
+    if (anomalies.length > 0) {
+        const badge = document.createElement('span');
+        badge.className = 'ml-1 px-2 py-0.5 text-xs rounded bg-red-100 text-red-800 dark:bg-red-900 dark:text-red-200';
+        badge.title = title;
+        badge.textContent = 'anomaly';
+        cell.appendChild(badge);
+    }
+}
+
+// Function to create a spacer row standing in for rows scrolled out of view
+function createSpacerRow() {
+    const row = document.createElement('tr');
+    const cell = document.createElement('td');
+    cell.colSpan = 8;
+    cell.style.padding = '0';
+    cell.style.border = '0';
+    row.appendChild(cell);
+    return row;
+}
+
+// Function to render the rows that intersect the scroll viewport
+function renderVisibleRows() {
+    const container = document.getElementById('processTableContainer');
+    const tableBody = document.getElementById('processTable');
+    if (!container || !tableBody) return;
+
+    if (!topSpacer) {
+        topSpacer = createSpacerRow();
+        bottomSpacer = createSpacerRow();
+        tableBody.append(topSpacer, bottomSpacer);
+    }
+
+    const total = tableRows.length;
+    const start = Math.max(0, Math.floor(container.scrollTop / rowHeight) - ROW_BUFFER);
+    const end = Math.min(total, Math.ceil((container.scrollTop + container.clientHeight) / rowHeight) + ROW_BUFFER);
+
+    // Drop rows that left the window, then place and patch the ones in it
+    const wanted = new Set();
+    for (let i = start; i < end; i++) {
+        wanted.add(tableRows[i].pid);
+    }
+    renderedRows.forEach((row, pid) => {
+        if (!wanted.has(pid)) {
+            row.remove();
+            renderedRows.delete(pid);
         }
-        
+    });
+
+    let previous = topSpacer;
+    for (let i = start; i < end; i++) {
+        const process = tableRows[i];
+        let row = renderedRows.get(process.pid);
+        if (!row) {
+            row = createProcessRow(process.pid);
+            renderedRows.set(process.pid, row);
+        }
+        patchProcessRow(row, process);
+        if (previous.nextSibling !== row) {
+            tableBody.insertBefore(row, previous.nextSibling);
+        }
+        previous = row;
+    }
+
+    topSpacer.firstChild.style.height = `${start * rowHeight}px`;
+    bottomSpacer.firstChild.style.height = `${(total - end) * rowHeight}px`;
+
+    // Calibrate the row height from a real row so the spacers match the content
+    const sample = previous !== topSpacer ? previous.offsetHeight : 0;
+    if (sample > 0 && sample !== rowHeight) {
+        rowHeight = sample;
+        scheduleTableRender();
+    }
+}
+
+// Function to switch between the process list and a grouped view
+function setGroupBy(value) {
+    groupBy = value;
+    document.getElementById('processTableContainer').classList.toggle('hidden', !!groupBy);
+    document.getElementById('groupTableContainer').classList.toggle('hidden', !groupBy);
+    refreshProcesses();
+}
+
+// Function to sort the grouped view
+function sortGroups(column) {
+    groupSort = column;
+    refreshGroups();
+}
+
+// Function to fetch and update grouped aggregates
+async function refreshGroups() {
+    try {
+        const response = await axios.get('/groups', { params: { by: groupBy, sort: groupSort } });
+        updateGroupTable(response.data.groups);
+    } catch (error) {
+        console.error('Error fetching process groups:', error);
+    }
+}
+
+// Function to update the grouped aggregates table
+function updateGroupTable(groups) {
+    const tableBody = document.getElementById('groupTable');
+    if (!tableBody || !Array.isArray(groups)) return;
+
+    const toMB = bytes => (bytes / 1024 / 1024).toFixed(1);
+    tableBody.innerHTML = '';
+
+    groups.forEach(group => {
+        const row = document.createElement('tr');
+        row.className = 'dark:text-gray-300 hover:bg-gray-50 dark:hover:bg-gray-800';
         row.innerHTML = `
-            <td class="px-6 py-4 whitespace-nowrap">${process.pid || ''}</td>
-            <td class="px-6 py-4 whitespace-nowrap">${process.name || ''}</td>
-            <td class="px-6 py-4 whitespace-nowrap">${process.cpu_percent?.toFixed(1) || '0'}</td>
-            <td class="px-6 py-4 whitespace-nowrap">${process.memory_percent?.toFixed(1) || '0'}</td>
-            <td class="px-6 py-4 whitespace-nowrap">${process.user || ''}</td>
-            <td class="px-6 py-4 whitespace-nowrap">${process.threads || '0'}</td>
-            <td class="px-6 py-4 whitespace-nowrap">${process.start_time || ''}</td>
-            <td class="px-6 py-4 whitespace-nowrap">
-                <div class="flex space-x-2">
-                    <button onclick="showKillModal(${process.pid}); event.stopPropagation();" 
-                            class="px-3 py-1 bg-red-500 text-white rounded hover:bg-red-600 dark:bg-red-600 dark:hover:bg-red-700">
-                        Kill
-                    </button>
-                    <button onclick="analyzeProcess(${process.pid}); event.stopPropagation();" 
-                            class="px-3 py-1 bg-indigo-500 text-white rounded hover:bg-indigo-600 dark:bg-indigo-600 dark:hover:bg-indigo-700">
-                        Analyze
-                    </button>
-                </div>
-            </td>
+            <td class="px-6 py-4 whitespace-nowrap"></td>
+            <td class="px-6 py-4 whitespace-nowrap">${group.count}</td>
+            <td class="px-6 py-4 whitespace-nowrap">${group.cpu_percent.sum.toFixed(1)} / ${group.cpu_percent.max.toFixed(1)}</td>
+            <td class="px-6 py-4 whitespace-nowrap">${toMB(group.rss.sum)} / ${toMB(group.rss.avg)} / ${toMB(group.rss.max)}</td>
+            <td class="px-6 py-4 whitespace-nowrap">${group.threads.sum}</td>
+            <td class="px-6 py-4 whitespace-nowrap">${toMB(group.io_read.sum)} / ${toMB(group.io_write.sum)}</td>
         `;
-        row.addEventListener('click', () => selectProcess(process.pid));
+        // Group keys are paths and names from the host, so never parse them as HTML
+        row.children[0].textContent = group.key;
         tableBody.appendChild(row);
     });
 }
 
+// Function to handle anomaly events pushed by the streaming detector
+function handleAnomalies(events) {
+    const systemEvents = [];
+    events.forEach(event => {
+        if (event.pid === null) {
+            systemEvents.push(event);
+        } else {
+            (liveAnomalies[event.pid] = liveAnomalies[event.pid] || []).push(event);
+        }
+    });
+
+    if (systemEvents.length > 0) {
+        const banner = document.getElementById('anomalyBanner');
+        if (banner && alertsEnabled) {
+            banner.textContent = systemEvents.map(e =>
+                `System ${e.metric} ${e.kind}: ${e.value} (baseline ${e.baseline})`
+            ).join(' | ');
+            banner.classList.remove('hidden');
+        }
+    }
+
+    if (!groupBy) {
+        updateProcessTable(searchTerm ? filteredProcesses : processes);
+    }
+}
+
 // Function to select a process
 function selectProcess(pid) {
     selectedPid = pid;
     // Highlight selected row
-    document.querySelectorAll('#processTable tr').forEach(row => {
-        row.classList.remove('bg-blue-100', 'dark:bg-blue-900');
+    renderedRows.forEach((row, rowPid) => {
+        row.classList.toggle('bg-blue-100', rowPid === pid);
+        row.classList.toggle('dark:bg-blue-900', rowPid === pid);
     });
-    const selectedRow = Array.from(document.querySelectorAll('#processTable tr')).find(row => 
-        row.children[0].textContent === pid.toString()
-    );
-    if (selectedRow) {
-        selectedRow.classList.add('bg-blue-100', 'dark:bg-blue-900');
-    }
 }
 
 // Process control functions
@@ -361,53 +561,39 @@ function toggleAlerts() {
 }
 
 // Chart update functions
+const chartSeries = [
+    { chart: cpuChart, key: 'cpu', value: v => parseFloat(v.toFixed(1)) },
+    { chart: memoryChart, key: 'memory', value: v => parseFloat(v.toFixed(1)) },
+    { chart: diskChart, key: 'disk', value: v => parseFloat(v.toFixed(1)) },
+    { chart: networkChart, key: 'network', value: v => parseFloat((v / 1024).toFixed(2)) }
+];
+const dirtyCharts = new Set();
+let chartFrameScheduled = false;
+
 function updateCharts(data) {
     if (!data) return;
     
     const timestamp = new Date(data.time);
     
-    // Update CPU chart
-    if (typeof data.cpu === 'number') {
-        cpuChart.data.labels.push(timestamp);
-        cpuChart.data.datasets[0].data.push(parseFloat(data.cpu.toFixed(1)));
-        if (cpuChart.data.labels.length > 60) {
-            cpuChart.data.labels.shift();
-            cpuChart.data.datasets[0].data.shift();
-        }
-        cpuChart.update('none');
-    }
-
-    // Update Memory chart
-    if (typeof data.memory === 'number') {
-        memoryChart.data.labels.push(timestamp);
-        memoryChart.data.datasets[0].data.push(parseFloat(data.memory.toFixed(1)));
-        if (memoryChart.data.labels.length > 60) {
-            memoryChart.data.labels.shift();
-            memoryChart.data.datasets[0].data.shift();
-        }
-        memoryChart.update('none');
-    }
-
-    // Update Disk chart
-    if (typeof data.disk === 'number') {
-        diskChart.data.labels.push(timestamp);
-        diskChart.data.datasets[0].data.push(parseFloat(data.disk.toFixed(1)));
-        if (diskChart.data.labels.length > 60) {
-            diskChart.data.labels.shift();
-            diskChart.data.datasets[0].data.shift();
+    // Append data now, but redraw all charts together in the next animation frame
+    chartSeries.forEach(({ chart, key, value }) => {
+        if (typeof data[key] !== 'number') return;
+        chart.data.labels.push(timestamp);
+        chart.data.datasets[0].data.push(value(data[key]));
+        if (chart.data.labels.length > 60) {
+            chart.data.labels.shift();
+            chart.data.datasets[0].data.shift();
         }
-        diskChart.update('none');
-    }
+        dirtyCharts.add(chart);
+    });
 
-    // Update Network chart
-    if (typeof data.network === 'number') {
-        networkChart.data.labels.push(timestamp);
-        networkChart.data.datasets[0].data.push(parseFloat((data.network / 1024).toFixed(2)));
-        if (networkChart.data.labels.length > 60) {
-            networkChart.data.labels.shift();
-            networkChart.data.datasets[0].data.shift();
-        }
-        networkChart.update('none');
+    if (!chartFrameScheduled && dirtyCharts.size > 0) {
+        chartFrameScheduled = true;
+        requestAnimationFrame(() => {
+            chartFrameScheduled = false;
+            dirtyCharts.forEach(chart => chart.update('none'));
+            dirtyCharts.clear();
+        });
     }
 }
 
@@ -438,6 +624,20 @@ function exportToCSV() {
     document.body.removeChild(link);
 }
 
+// Function to download recorded history streamed by the server
+function exportHistory() {
+    const minutes = parseFloat(prompt('Export how many minutes of history?', '60'));
+    if (!minutes || minutes <= 0) return;
+
+    const start = Date.now() / 1000 - minutes * 60;
+    const link = document.createElement('a');
+    link.setAttribute('href', `/export?kind=processes&format=csv&gzip=1&start=${start}`);
+    link.style.visibility = 'hidden';
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+}
+
 // Function to toggle dark/light theme
 function toggleTheme() {
     if (document.documentElement.classList.contains('dark')) {
@@ -620,7 +820,7 @@ function showSystemAnalysisModal(data) {
             
             <div class="grid grid-cols-1 md:grid-cols-2 gap-4 mb-6">
                 <div class="bg-gray-100 dark:bg-gray-800 p-4 rounded-lg">
-                    <h3 class="font-semibold dark:text-white mb-2">Top CPU Processes</h3>
+                    <h3 class="font-semibold dark:text-white mb-2">Top CPU Processes (5m avg)</h3>
                     <ul class="space-y-1">
                         ${data.system_data.top_cpu_processes.map(p => 
                             `<li class="dark:text-gray-300">${p.name} (${p.cpu_percent}%)</li>`
@@ -684,6 +884,30 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // Virtualized table: re-render on scroll and dispatch row clicks from one listener
+    const tableContainer = document.getElementById('processTableContainer');
+    if (tableContainer) {
+        tableContainer.addEventListener('scroll', scheduleTableRender, { passive: true });
+    }
+    window.addEventListener('resize', scheduleTableRender);
+
+    const processTable = document.getElementById('processTable');
+    if (processTable) {
+        processTable.addEventListener('click', (e) => {
+            const row = e.target.closest('tr[data-pid]');
+            if (!row) return;
+            const pid = parseInt(row.dataset.pid, 10);
+            const action = e.target.closest('button')?.dataset.action;
+            if (action === 'kill') {
+                showKillModal(pid);
+            } else if (action === 'analyze') {
+                analyzeProcess(pid);
+            } else {
+                selectProcess(pid);
+            }
+        });
+    }
+
     // Set up WebSocket event listeners
     socket.on('system_stats', (data) => {
         if (updatesEnabled) {
@@ -691,6 +915,12 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
 
+    socket.on('anomalies', (events) => {
+        if (updatesEnabled) {
+            handleAnomalies(events);
+        }
+    });
+
     // Set up periodic refresh
     let refreshInterval = setInterval(() => {
         if (updatesEnabled) {
@@ -0,0 +1,52 @@
+import random
+
+from aggregates import Group, GroupAggregator
+from tests.util import make_snapshot
+
+def test_max_recomputed_after_max_holder_leaves():
+    group = Group()
+    group.add(1, (10.0, 500, 1, 0, 0))
+    group.add(2, (30.0, 100, 1, 0, 0))
+    group.remove(2)
+    result = group.to_dict('k')
+    assert result['cpu_percent']['max'] == 10.0
+    assert result['rss']['max'] == 500
+
+def test_max_recomputed_after_max_holder_shrinks():
+    group = Group()
+    group.add(1, (10.0, 500, 1, 0, 0))
+    group.add(2, (30.0, 100, 1, 0, 0))
+    group.change(2, (30.0, 100, 1, 0, 0), (5.0, 100, 1, 0, 0))
+    assert group.to_dict('k')['cpu_percent']['max'] == 10.0
+
+def test_growth_after_shrink_clears_stale_max():
+    group = Group()
+    group.add(1, (10.0, 0, 1, 0, 0))
+    group.add(2, (30.0, 0, 1, 0, 0))
+    group.change(2, (30.0, 0, 1, 0, 0), (5.0, 0, 1, 0, 0))
+    group.change(1, (10.0, 0, 1, 0, 0), (40.0, 0, 1, 0, 0))
+    assert group.to_dict('k')['cpu_percent']['max'] == 40.0
+
+def test_aggregator_matches_recomputation():
+    rng = random.Random(3)
+    procs = {}
+    aggregator = GroupAggregator(('user',))
+    for tick in range(200):
+        for pid in rng.sample(range(1, 60), 5):
+            if pid in procs and rng.random() < 0.5:
+                del procs[pid]
+            elif pid not in procs or rng.random() < 0.5:
+                # A reused pid is a new process, possibly owned by someone else
+                procs[pid] = {'pid': pid, 'create_time': float(tick),
+                              'user': rng.choice(['root', 'alice', 'bob'])}
+        for proc in procs.values():
+            proc['cpu_percent'] = float(rng.randint(0, 100))
+            proc['rss'] = rng.randint(0, 1000)
+        aggregator.update(make_snapshot(float(tick), list(procs.values())))
+
+        for group in aggregator.query('user'):
+            members = [p for p in procs.values() if p['user'] == group['key']]
+            assert group['count'] == len(members)
+            for field in ('cpu_percent', 'rss'):
+                assert group[field]['max'] == max(p[field] for p in members)
+                assert group[field]['sum'] == sum(p[field] for p in members)
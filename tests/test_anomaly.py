@@ -0,0 +1,45 @@
+import random
+
+from anomaly import AnomalyDetector
+from tests.util import make_snapshot
+
+def run_process(cpu_at, seconds, warmup=600):
+    """Feed one process whose CPU follows cpu_at(second) after warmup seconds at ~2%; return its events"""
+    rng = random.Random(5)
+    detector = AnomalyDetector()
+    events = []
+    for t in range(warmup + seconds):
+        cpu = 2.0 + rng.uniform(-1, 1) if t < warmup else cpu_at(t - warmup)
+        detector.update(make_snapshot(float(t), [{'pid': 10, 'name': 'job', 'cpu_percent': cpu}]))
+        events.extend(detector.pop_events())
+    return [(event['kind'], event['metric']) for event in events]
+
+def run_system(cpu_at, seconds, warmup=600):
+    rng = random.Random(5)
+    detector = AnomalyDetector()
+    events = []
+    for t in range(warmup + seconds):
+        cpu = 7.0 + rng.uniform(-1, 1) if t < warmup else cpu_at(t - warmup)
+        detector.update_system({'time': t * 1000, 'cpu': cpu, 'memory': 40.0, 'disk': 50.0, 'network': 0})
+        events.extend(detector.pop_events())
+    return [(event['kind'], event['metric']) for event in events]
+
+def test_steady_noise_raises_nothing():
+    assert run_process(lambda t: 2.0 + random.Random(t).uniform(-1, 1), 1800) == []
+
+def test_step_is_a_spike_then_a_drift():
+    events = run_process(lambda t: 90.0, 60)
+    assert events == [('spike', 'cpu_percent'), ('drift', 'cpu_percent')]
+
+def test_slow_ramps_drift():
+    for seconds in (300, 900):
+        events = run_process(lambda t: 2.0 + 88.0 * t / seconds, seconds)
+        assert ('drift', 'cpu_percent') in events, seconds
+
+def test_system_step_drifts():
+    events = run_system(lambda t: 95.0, 50)
+    assert ('spike', 'cpu') in events
+    assert ('drift', 'cpu') in events
+
+def test_lasting_shift_is_reported_once():
+    assert run_process(lambda t: 60.0, 3600) == [('spike', 'cpu_percent'), ('drift', 'cpu_percent')]
@@ -0,0 +1,26 @@
+import threading
+
+from collector import ProcessCollector
+from tests.util import make_snapshot
+
+class FakeBackend:
+    def __init__(self):
+        self.ticks = 0
+
+    def sample(self):
+        self.ticks += 1
+        return make_snapshot(float(self.ticks), [{'pid': 1}])
+
+def test_wait_newer_returns_the_next_sample():
+    collector = ProcessCollector(FakeBackend())
+    previous = collector.sample()
+    timer = threading.Timer(0.05, collector.sample)
+    timer.start()
+    snapshot = collector.wait_newer(previous, 5)
+    timer.join()
+    assert snapshot is not previous and snapshot.time == 2.0
+
+def test_wait_newer_times_out():
+    collector = ProcessCollector(FakeBackend())
+    previous = collector.sample()
+    assert collector.wait_newer(previous, 0.01) is None
@@ -0,0 +1,37 @@
+import pwd
+
+import pytest
+
+from collector import ProcfsBackend
+
+pytestmark = pytest.mark.skipif(not hasattr(pwd, 'getpwuid'), reason='needs a POSIX user database')
+
+def write_proc(root, pid, comm, uid):
+    # state ppid pgrp session tty tpgid flags minflt cminflt majflt cmajflt utime stime cutime cstime
+    # priority nice threads itrealvalue starttime vsize rss
+    fields = ['S', '1'] + ['0'] * 9 + ['5', '5', '0', '0', '20', '0', '3', '0', '100', '0', '7']
+    directory = root / str(pid)
+    directory.mkdir(exist_ok=True)
+    (directory / 'stat').write_text(f"{pid} ({comm}) {' '.join(fields)}\n")
+    (directory / 'status').write_text(f"Name:\t{comm}\nUmask:\t0022\nUid:\t{uid}\t{uid}\t{uid}\t{uid}\n")
+
+@pytest.fixture
+def proc(tmp_path):
+    (tmp_path / 'self').mkdir()
+    (tmp_path / 'stat').write_text('cpu  1 2 3 4\nbtime 1000\n')
+    return tmp_path
+
+def test_user_follows_setuid_without_exec(proc):
+    write_proc(proc, 42, 'worker', 0)
+    backend = ProcfsBackend(str(proc))
+    assert backend.sample().row(0)['user'] == pwd.getpwuid(0).pw_name
+
+    # Privilege drop after fork: same process, same comm, new real uid
+    write_proc(proc, 42, 'worker', 65534)
+    snapshot = backend.sample()
+    try:
+        expected = pwd.getpwuid(65534).pw_name
+    except KeyError:
+        expected = '65534'
+    assert snapshot.row(0)['user'] == expected
+    assert snapshot.row(0)['threads'] == 3
@@ -0,0 +1,25 @@
+import time
+
+from flight_recorder import FlightRecorder
+
+def wait_for_files(directory, count):
+    deadline = time.monotonic() + 5
+    while len(list(directory.iterdir())) != count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return sorted(path.name for path in directory.iterdir())
+
+def test_forced_dumps_in_the_same_second_get_their_own_files(tmp_path):
+    recorder = FlightRecorder(directory=str(tmp_path))
+    recorder.record('system', {'cpu': 1.0})
+    paths = [recorder.dump('manual', force=True) for _ in range(3)]
+    assert len(set(paths)) == 3
+    # Name order is dump order
+    assert wait_for_files(tmp_path, 3) == sorted(path.rsplit('/', 1)[1] for path in paths)
+
+def test_alert_dumps_only_on_onset_and_prune_to_max_files(tmp_path):
+    recorder = FlightRecorder(directory=str(tmp_path), max_files=2)
+    assert recorder.update_alerts({'a': 'cpu spike'}) is not None
+    assert recorder.update_alerts({'a': 'cpu spike'}) is None
+    for _ in range(3):
+        recorder.dump('manual', force=True)
+    assert len(wait_for_files(tmp_path, 2)) == 2
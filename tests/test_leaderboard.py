@@ -0,0 +1,41 @@
+from leaderboard import CHECKPOINT_SECONDS, MAX_WINDOW, Leaderboards
+from tests.util import make_snapshot
+
+def run(boards, start, end, procs):
+    for t in range(start, end + 1):
+        boards.update(make_snapshot(float(t), procs))
+
+def test_windows_start_at_checkpoints():
+    boards = Leaderboards()
+    busy = {'pid': 10, 'cpu_percent': 50.0, 'rss': 1000}
+    run(boards, 0, 600, [busy])
+    busy['cpu_percent'] = 10.0
+    busy['rss'] = 5000
+    run(boards, 601, 1200, [busy])
+
+    assert boards.top('1m', metric='cpu')[0]['value'] == 10.0
+    assert boards.top('5m', metric='cpu')[0]['value'] == 10.0
+    # 300 s at 50% and 600 s at 10%
+    assert boards.top('15m', metric='cpu')[0]['value'] == 23.3
+    assert boards.top('1m', metric='rss_growth')[0]['value'] == 0
+    assert boards.top('15m', metric='rss_growth')[0]['value'] == 4000
+
+def test_old_checkpoints_expire_but_cover_the_widest_window():
+    boards = Leaderboards()
+    run(boards, 0, 3 * MAX_WINDOW, [{'pid': 10}])
+    state = boards.procs[10]
+    assert state.times[0] <= state.last_time - MAX_WINDOW
+    assert len(state.times) <= MAX_WINDOW // CHECKPOINT_SECONDS + 2
+
+def test_exit_and_pid_reuse_reset_the_window():
+    boards = Leaderboards()
+    run(boards, 0, 100, [{'pid': 10, 'cpu_percent': 90.0}, {'pid': 11, 'cpu_percent': 5.0}])
+    run(boards, 101, 101, [{'pid': 11, 'cpu_percent': 5.0}])
+    assert 10 not in boards.procs
+
+    reused = {'pid': 11, 'create_time': 50.0, 'name': 'new', 'cpu_percent': 1.0}
+    run(boards, 102, 102, [reused])
+    # A freshly seen process has no elapsed time to rank yet
+    assert boards.top('1m', metric='cpu') == []
+    run(boards, 103, 120, [reused])
+    assert boards.top('1m', metric='cpu') == [{'pid': 11, 'name': 'new', 'value': 1.0}]
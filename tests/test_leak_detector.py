@@ -0,0 +1,54 @@
+import math
+import random
+
+from leak_detector import TREND_SECONDS, TrendFit
+
+def reference_fit(samples):
+    """Weighted least squares computed directly, with weights decayed from the last sample"""
+    last = samples[-1][0]
+    t0, x0 = samples[0]
+    w = st = sx = stt = stx = sxx = 0.0
+    for t, x in samples:
+        weight = math.exp(-(last - t) / TREND_SECONDS)
+        t -= t0
+        x -= x0
+        w += weight
+        st += weight * t
+        sx += weight * x
+        stt += weight * t * t
+        stx += weight * t * x
+        sxx += weight * x * x
+    var_t = w * stt - st * st
+    var_x = w * sxx - sx * sx
+    cov = w * stx - st * sx
+    return cov / var_t, cov * cov / (var_t * var_x)
+
+def test_linear_growth_gives_exact_slope_across_recentring():
+    fit = TrendFit(0.0, 1e9)
+    for t in range(10, 12 * TREND_SECONDS, 10):
+        fit.add(float(t), 1e9 + 2048.0 * t)
+    assert fit.t0 > 0  # re-centred at least once
+    assert abs(fit.slope() - 2048.0) < 1e-6
+    assert fit.r2() > 0.999999
+
+def test_recentre_matches_direct_fit():
+    rng = random.Random(11)
+    samples = [(0.0, 5e8)]
+    fit = TrendFit(*samples[0])
+    for t in range(5, 25 * TREND_SECONDS, 5):
+        x = 5e8 + 300.0 * t + rng.gauss(0, 1e5)
+        samples.append((float(t), x))
+        fit.add(float(t), x)
+    slope, r2 = reference_fit(samples)
+    assert math.isclose(fit.slope(), slope, rel_tol=1e-6)
+    assert math.isclose(fit.r2(), r2, rel_tol=1e-6)
+
+def test_recentre_leaves_fit_unchanged():
+    fit = TrendFit(0.0, 0.0)
+    for t, x in ((30.0, 100.0), (60.0, 130.0), (90.0, 260.0), (120.0, 270.0)):
+        fit.add(t, x)
+    slope, r2 = fit.slope(), fit.r2()
+    fit._recentre(120.0)
+    assert fit.t0 == 120.0
+    assert math.isclose(fit.slope(), slope, rel_tol=1e-9)
+    assert math.isclose(fit.r2(), r2, rel_tol=1e-9)
@@ -0,0 +1,108 @@
+import random
+
+from process_tree import ProcessTree
+from tests.util import make_snapshot
+
+def expected_totals(procs):
+    """Recompute every subtree total from scratch"""
+    by_pid = {p['pid']: p for p in procs}
+    totals = {}
+    for proc in procs:
+        seen = set()
+        node = proc
+        while node is not None and node['pid'] not in seen:
+            seen.add(node['pid'])
+            total = totals.setdefault(node['pid'], [0.0, 0, 0])
+            total[0] += proc['cpu_percent']
+            total[1] += proc['rss']
+            total[2] += 1
+            node = by_pid.get(node['ppid'])
+    return totals
+
+def assert_matches(tree, procs):
+    for pid, (cpu, rss, count) in expected_totals(procs).items():
+        subtree = tree.node(pid)['subtree']
+        assert subtree['processes'] == count, pid
+        assert subtree['rss'] == rss, pid
+        assert abs(subtree['cpu_percent'] - round(cpu, 1)) < 0.11, pid
+
+def test_rollups_follow_forks_exits_and_reparenting():
+    rng = random.Random(7)
+    procs = [{'pid': 1, 'ppid': 0, 'create_time': 1.0, 'cpu_percent': 0.0, 'rss': 100}]
+    next_pid = 2
+    tree = ProcessTree()
+    for tick in range(300):
+        action = rng.random()
+        if action < 0.4 or len(procs) < 3:
+            parent = rng.choice(procs)
+            procs.append({'pid': next_pid, 'ppid': parent['pid'], 'create_time': float(tick),
+                          'cpu_percent': 0.0, 'rss': rng.randint(1, 1000)})
+            next_pid += 1
+        elif action < 0.7:
+            victim = rng.choice(procs[1:])
+            procs.remove(victim)
+            # Orphans are adopted by init
+            for proc in procs:
+                if proc['ppid'] == victim['pid']:
+                    proc['ppid'] = 1
+        else:
+            proc = rng.choice(procs[1:])
+            proc['ppid'] = 1
+        for proc in procs:
+            proc['cpu_percent'] = rng.choice([0.0, 1.5, 12.0])
+            proc['rss'] += rng.randint(-10, 10)
+        tree.update(make_snapshot(float(tick), procs))
+        assert_matches(tree, procs)
+
+def test_reparenting_moves_the_whole_subtree():
+    procs = [
+        {'pid': 1, 'ppid': 0, 'rss': 1},
+        {'pid': 2, 'ppid': 1, 'rss': 10},
+        {'pid': 3, 'ppid': 1, 'rss': 100},
+        {'pid': 4, 'ppid': 3, 'rss': 1000}
+    ]
+    tree = ProcessTree()
+    tree.update(make_snapshot(1.0, procs))
+    procs[2]['ppid'] = 2
+    tree.update(make_snapshot(2.0, procs))
+
+    assert tree.node(2)['subtree']['rss'] == 1110
+    assert tree.node(1)['subtree']['rss'] == 1111
+    assert [child['pid'] for child in tree.children(1)] == [2]
+
+def test_exit_removes_subtree_and_orphans_become_roots_until_adopted():
+    procs = [
+        {'pid': 1, 'ppid': 0, 'rss': 1},
+        {'pid': 2, 'ppid': 1, 'rss': 10},
+        {'pid': 3, 'ppid': 2, 'rss': 100}
+    ]
+    tree = ProcessTree()
+    tree.update(make_snapshot(1.0, procs))
+    del procs[1]
+    tree.update(make_snapshot(2.0, procs))
+
+    assert tree.node(2) is None
+    # The snapshot still names the dead parent, so the orphan waits as a root
+    assert 3 in tree.roots
+    assert tree.node(1)['subtree']['rss'] == 1
+
+    procs[1]['ppid'] = 1
+    tree.update(make_snapshot(3.0, procs))
+    assert tree.node(1)['subtree']['rss'] == 101
+    assert 3 not in tree.roots
+
+def test_pid_reuse_replaces_the_node():
+    procs = [
+        {'pid': 1, 'ppid': 0, 'rss': 1},
+        {'pid': 2, 'ppid': 1, 'rss': 10, 'name': 'old', 'create_time': 1.0},
+        {'pid': 3, 'ppid': 2, 'rss': 100}
+    ]
+    tree = ProcessTree()
+    tree.update(make_snapshot(1.0, procs))
+    procs[1] = {'pid': 2, 'ppid': 1, 'rss': 20, 'name': 'new', 'create_time': 5.0}
+    procs[2]['ppid'] = 1
+    tree.update(make_snapshot(2.0, procs))
+
+    assert tree.node(2)['name'] == 'new'
+    assert tree.node(2)['subtree'] == {**tree.node(2)['subtree'], 'rss': 20, 'processes': 1}
+    assert tree.node(1)['subtree']['rss'] == 121
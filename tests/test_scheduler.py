@@ -0,0 +1,33 @@
+from scheduler import AdaptiveScheduler
+
+def test_leader_idles_without_subscribers():
+    scheduler = AdaptiveScheduler(1.0, idle_interval=None, cpu_budget=0)
+    assert scheduler.next_interval() is None
+    scheduler.subscribe()
+    assert scheduler.next_interval() == 1.0
+
+def test_followers_keep_their_interval_without_subscribers():
+    scheduler = AdaptiveScheduler(1.0, idle_interval=None, cpu_budget=0.05)
+    follower = scheduler.follower(0.25)
+    assert follower.next_interval() == 0.25
+    # Capped only by the follower's share of the budget
+    assert follower.next_interval(cost=0.01) == 0.01 / follower.cpu_budget
+    assert abs(scheduler.cpu_budget + follower.cpu_budget - 0.05) < 1e-12
+
+def test_followers_share_the_leaders_burst():
+    scheduler = AdaptiveScheduler(1.0, burst_interval=0.25, cpu_budget=0)
+    follower = scheduler.follower(0.5, burst_interval=0.1)
+    scheduler.subscribe()
+    scheduler.next_interval({'cpu': 10})
+    assert scheduler.next_interval({'cpu': 90}) == 0.25
+    assert follower.next_interval() == 0.1
+
+def test_requests_keep_the_leader_awake():
+    scheduler = AdaptiveScheduler(1.0, idle_interval=None, cpu_budget=0)
+    assert scheduler.request() is True
+    assert scheduler.wakeup.is_set()
+    assert scheduler.next_interval() == 1.0
+    # Already sampling for a recent request, so nothing to wake
+    assert scheduler.request() is False
+    scheduler.demand_until = 0.0
+    assert scheduler.next_interval() is None
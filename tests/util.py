@@ -0,0 +1,22 @@
+"""Helpers for building collector snapshots in tests"""
+from collector import Snapshot
+
+def make_snapshot(timestamp, procs):
+    """Build a Snapshot from dicts with pid and any Snapshot.append fields (others default)"""
+    snapshot = Snapshot(timestamp)
+    for proc in procs:
+        snapshot.append(
+            proc['pid'],
+            proc.get('ppid', 0),
+            proc.get('create_time', 1.0),
+            proc.get('name', f"proc{proc['pid']}"),
+            proc.get('user', 'root'),
+            proc.get('exe', ''),
+            proc.get('cgroup', ''),
+            proc.get('cpu_percent', 0.0),
+            proc.get('rss', 0),
+            proc.get('threads', 1),
+            proc.get('io_read', 0),
+            proc.get('io_write', 0)
+        )
+    return snapshot